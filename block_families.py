@@ -0,0 +1,235 @@
+import os
+import argparse
+import numpy as np
+from schem_decode import compile_palette
+from schematic_readers import read_schematic
+from theme_cli import base_folder
+from theme_metrics import log_event, metrics
+from theme_outputs import write_column_csv, write_document
+from theme_pipeline import (
+    ColumnCounts,
+    ColumnTable,
+    build_processor_document,
+    build_replacements,
+    ignored_blocks,
+    read_block_counts,
+    weigh_columns,
+)
+
+# Shape suffixes of the placeholder blocks in the column order of the processor templates; shape ids index
+# into it and are written as the Column of derived CSVs, so derived and template themes number shapes alike
+shapes = (
+    "", "_directional_pillar", "_slab", "_stairs", "_wall", "_button", "_pressure_plate",
+    "_fence", "_fence_gate", "_glass", "_glass_pane", "_trapdoor", "_door",
+)
+
+# Block name endings that give the shape away, for matching only: longer endings before the ones they contain
+shape_endings = tuple(sorted((shape for shape in shapes if shape not in ("", "_directional_pillar")), key=len, reverse=True))
+
+# Shapes the templates have no placeholder column for yet; their blocks are classified but not written
+unplaced_shapes = {"_door"}
+
+# Endings of blocks placed along an axis; any block state with an axis property counts too
+pillar_endings = ("_log", "_wood", "_stem", "_hyphae", "_pillar")
+
+# Base block endings rewritten so a base block shares its family with its shapes (oak_planks and oak_stairs)
+base_endings = (("_planks", ""), ("_block", ""), ("_bricks", "_brick"), ("_tiles", "_tile"))
+
+# Blocks whose shape does not show in their name: name -> (family, shape)
+special_blocks = {
+    "minecraft:glass": ("minecraft:glass", "_glass"),
+    "minecraft:glass_pane": ("minecraft:glass", "_glass_pane"),
+    "minecraft:iron_bars": ("minecraft:iron_bars", "_glass_pane"),
+    "minecraft:basalt": ("minecraft:basalt", "_directional_pillar"),
+    "minecraft:polished_basalt": ("minecraft:basalt", "_directional_pillar"),
+    # The _bricks ending needs a prefix; bare bricks go with brick_stairs, brick_slab and brick_wall
+    "minecraft:bricks": ("minecraft:brick", ""),
+}
+
+# Function: classify_block_state
+# Purpose: Splits a block state into the block family it belongs to and its shape
+# Input: Block state string, e.g. minecraft:stripped_oak_log[axis=y]
+# Output: Tuple of (family name, shape suffix from shapes), e.g. ("minecraft:oak", "_directional_pillar")
+def classify_block_state(state):
+    name, _, properties = state.partition("[")
+    if name in special_blocks:
+        return special_blocks[name]
+
+    for ending in shape_endings:
+        if name.endswith(ending):
+            return name[:-len(ending)], ending
+
+    namespace, _, local = name.rpartition(":")
+    if local.endswith(pillar_endings) or "axis=" in properties:
+        local = local.removeprefix("stripped_")
+        for ending in pillar_endings:
+            if local.endswith(ending):
+                local = local[:-len(ending)]
+                break
+        return f"{namespace}:{local}", "_directional_pillar"
+
+    for ending, replacement in base_endings:
+        if local.endswith(ending):
+            local = local[:-len(ending)] + replacement
+            break
+    return f"{namespace}:{local}", ""
+
+# Class: BlockFamilyIndex
+# Purpose: Interned family and shape ids of block states, so classifying a volume is array indexing
+class BlockFamilyIndex:
+    """Classifies each distinct block state once and hands out dense lookup tables.
+
+    A room has a few hundred palette entries but millions of voxels, so the name rules in
+    classify_block_state run per palette entry and every voxel is then classified by indexing
+    the palette_lookup arrays with the decoded palette indices.
+    """
+    __slots__ = ("families", "family_ids", "states")
+
+    def __init__(self):
+        self.families = []    # Family id -> family name
+        self.family_ids = {}  # Family name -> family id
+        self.states = {}      # Block state -> (family id, shape id)
+
+    def classify(self, state):
+        classified = self.states.get(state)
+        if classified is None:
+            family, shape = classify_block_state(state)
+            family_id = self.family_ids.get(family)
+            if family_id is None:
+                family_id = self.family_ids[family] = len(self.families)
+                self.families.append(family)
+            classified = self.states[state] = (family_id, shapes.index(shape))
+        return classified
+
+    def palette_lookup(self, palette, size):
+        """Family id and shape id arrays indexed by palette index (-1 for indices without an entry)."""
+        family_of = np.full(size, -1, dtype=np.int32)
+        shape_of = np.zeros(size, dtype=np.int32)
+        for state, palette_index in palette.items():
+            family_of[palette_index], shape_of[palette_index] = self.classify(state)
+        return family_of, shape_of
+
+# Function: family_processors
+# Purpose: Gives every block family of a reference theme the processor that uses it most
+# Input: BlockFamilyIndex and the reference theme's counts as returned by read_block_counts
+# Output: Dictionary of family id -> processor number
+def family_processors(index, theme_counts):
+    """Maps families to processors from a theme that already has templates.
+
+    A family used by several processors (cobblestone in a floor and a wall processor, say)
+    goes to the one with the most blocks of it; ties go to the lower processor number.
+    """
+    family_totals = {}
+    for processor_type, block_counts in theme_counts.items():
+        processor_num = int(processor_type.removeprefix("wotr:processor_block_").split("_")[0])
+        for block, count in block_counts.items():
+            totals = family_totals.setdefault(index.classify(block)[0], {})
+            totals[processor_num] = totals.get(processor_num, 0) + count
+
+    return {
+        family_id: min(totals, key=lambda processor_num: (-totals[processor_num], processor_num))
+        for family_id, totals in family_totals.items()
+    }
+
+# Function: count_room_blocks
+# Purpose: Adds the blocks of one finished room to per-processor, per-shape counts
+# Input: BlockFamilyIndex, family -> processor mapping, SchematicData and the running counts
+# Output: Number of meaningful voxels whose family no processor uses
+def count_room_blocks(index, processor_of, schematic, counts):
+    """Classifies every voxel of a room and counts it under (processor, shape, block).
+
+    counts maps (processor number, shape id) -> {block name: count} and is updated in place.
+    Ignored blocks and processor placeholders are skipped.
+    """
+    block_data = schematic.block_data
+    tables = compile_palette(schematic.palette, ignored_blocks, int(block_data.max(initial=0)))
+    family_of, shape_of = index.palette_lookup(schematic.palette, len(tables.block_ids))
+
+    processor_table = np.zeros(len(index.families) + 1, dtype=np.int32)  # Last slot: no palette entry
+    for family_id, processor_num in processor_of.items():
+        processor_table[family_id] = processor_num
+
+    meaningful = ~(tables.ignored | tables.placeholder)[block_data]
+    palette_indices = block_data[meaningful]
+    voxel_processors = processor_table[family_of[palette_indices]]
+    assigned = voxel_processors > 0
+
+    shape_count = len(shapes)
+    id_count = len(tables.block_names)
+    keys = (voxel_processors[assigned].astype(np.int64) * shape_count + shape_of[palette_indices[assigned]]) * id_count \
+        + tables.block_ids[palette_indices[assigned]]
+    unique_keys, first_seen, key_counts = np.unique(keys, return_index=True, return_counts=True)
+    order = np.argsort(first_seen, kind="stable")
+    for key, count in zip(unique_keys[order].tolist(), key_counts[order].tolist()):
+        column_key, block_id = divmod(key, id_count)
+        block_counts = counts.setdefault(divmod(column_key, shape_count), {})
+        name = tables.block_names[block_id]
+        block_counts[name] = block_counts.get(name, 0) + count
+
+    unassigned = int((~assigned).sum())
+    metrics.incr("voxels_classified", len(palette_indices))
+    metrics.incr("voxels_unassigned", unassigned)
+    return unassigned
+
+# Function: derive_room_counts
+# Purpose: Builds per-processor, per-shape block counts from finished room schematics
+# Input: Paths of the room schematics and the reference theme's counts as returned by read_block_counts
+# Output: List of ColumnCounts, one per processor, with one ColumnTable per shape found
+def derive_room_counts(room_paths, theme_counts):
+    index = BlockFamilyIndex()
+    processor_of = family_processors(index, theme_counts)
+    counts = {}
+    for room_path in room_paths:
+        with metrics.timer("read"):
+            schematic = read_schematic(room_path)
+        with metrics.timer("classify"):
+            unassigned = count_room_blocks(index, processor_of, schematic, counts)
+        log_event("room_classified", f"✅ {os.path.basename(room_path)}: {unassigned} blocks outside the reference families",
+                  room=room_path, unassigned=unassigned)
+
+    derived = []
+    for processor_num in sorted({processor_num for processor_num, _ in counts}):
+        columns = [
+            ColumnTable(shape_id, f"wotr:processor_block_{processor_num}{shapes[shape_id]}",
+                        counts[processor_num, shape_id].keys(), list(counts[processor_num, shape_id].values()))
+            for shape_id in range(len(shapes))
+            if (processor_num, shape_id) in counts and shapes[shape_id] not in unplaced_shapes
+        ]
+        derived.append(ColumnCounts(processor_num, columns))
+    return derived
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive processor block weights from finished room schematics.")
+    parser.add_argument("rooms", nargs="+", help="Room schematics (.schem, .schematic or .litematic)")
+    parser.add_argument("--reference", required=True, help="Theme folder whose BlockCounts decide which processor uses which block family")
+    parser.add_argument("--name", required=True, help="Name of the derived theme; its BlockCounts and BlockWeights go in a folder of this name")
+    parser.add_argument("--root", default=base_folder, help="Folder containing the theme folders")
+    parser.add_argument("-o", "--output", help="Also write a processors document with default features to this path")
+    args = parser.parse_args()
+
+    reference_counts = os.path.join(args.root, args.reference, "BlockCounts")
+    if not os.path.isdir(reference_counts):
+        raise SystemExit(f"No BlockCounts folder in {args.reference}, run the generator for this theme first")
+
+    derived = derive_room_counts(args.rooms, read_block_counts(reference_counts))
+    csv_counts_folder = os.path.join(args.root, args.name, "BlockCounts")
+    csv_weights_folder = os.path.join(args.root, args.name, "BlockWeights")
+    os.makedirs(csv_counts_folder, exist_ok=True)
+    os.makedirs(csv_weights_folder, exist_ok=True)
+
+    weighted_processors = []
+    for counted in derived:
+        weighted = weigh_columns(counted)
+        weighted_processors.append(weighted)
+        write_column_csv(os.path.join(csv_counts_folder, f"Processor{counted.processor_num}_blockCounts.csv"), "BlockCounts", counted.columns)
+        write_column_csv(os.path.join(csv_weights_folder, f"Processor{counted.processor_num}_blockWeights.csv"), "BlockWeights", weighted.columns)
+        print(f"✅ processor{counted.processor_num}: {', '.join(shapes[table.column] or 'base' for table in counted.columns)}")
+
+    if args.output:
+        write_document(args.output, build_processor_document(list(build_replacements(weighted_processors)), {}))
+        print(f"✅ Wrote {args.output}")
+    if metrics.counters["voxels_unassigned"]:
+        print(f"⚠️ {metrics.counters['voxels_unassigned']} blocks belong to no family of {args.reference}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import json
+import zipfile
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# Namespaced block id, optionally with a [property=value,...] block state
+block_id_pattern = re.compile(r"[a-z0-9_.-]+:[a-z0-9_./-]+(\[[a-z0-9_]+=[a-z0-9_]+(,[a-z0-9_]+=[a-z0-9_]+)*\])?")
+
+# Processor list entries inside a data pack
+datapack_member_pattern = re.compile(r"data/[^/]+/worldgen/processor_list/.+\.json")
+
+# Largest distance of a replacement's step sizes from 1.0 (normalize_weights rounds to 3 decimals)
+step_sum_tolerance = 0.0015
+
+# Function: issue
+# Purpose: Builds one machine-readable validation finding
+# Input: Severity ("error" or "warning"), short code, JSON pointer into the document and a message
+# Output: Issue dictionary
+def issue(severity, code, pointer, message):
+    return {"severity": severity, "code": code, "pointer": pointer, "message": message}
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _check_rarity(processor, pointer, issues):
+    rarity = processor.get("rarity")
+    if not _is_number(rarity):
+        issues.append(issue("error", "rarity_type", f"{pointer}/rarity", f"rarity must be a number, got {rarity!r}"))
+    elif rarity <= 0:
+        issues.append(issue("error", "rarity_zero", f"{pointer}/rarity", "rarity is 0 or less, so the processor never applies"))
+    elif rarity > 1:
+        issues.append(issue("error", "rarity_range", f"{pointer}/rarity", f"rarity {rarity} is above 1"))
+
+def _check_block_id(value, pointer, issues):
+    if not isinstance(value, str) or not block_id_pattern.fullmatch(value):
+        issues.append(issue("error", "block_id", pointer, f"{value!r} is not a namespaced block id"))
+
+# Function: check_spot_gradient
+# Purpose: Checks a wotr:spot_gradient entry: noise scales, input states, output_steps and their sums
+# Input: Processor dictionary, its JSON pointer and the list to add issues to
+# Output: None
+def check_spot_gradient(processor, pointer, issues):
+    for axis in "xyz":
+        scale = processor.get(f"noise_scale_{axis}")
+        if not _is_number(scale) or scale <= 0:
+            issues.append(issue("error", "noise_scale", f"{pointer}/noise_scale_{axis}", f"noise_scale_{axis} must be a positive number, got {scale!r}"))
+
+    replacements = processor.get("replacements")
+    if not isinstance(replacements, list) or not replacements:
+        issues.append(issue("error", "replacements_empty", f"{pointer}/replacements", "spot_gradient has no replacements"))
+        return
+
+    seen_states = set()
+    for i, replacement in enumerate(replacements):
+        at = f"{pointer}/replacements/{i}"
+        if not isinstance(replacement, dict):
+            issues.append(issue("error", "replacement", at, "replacement must be an object"))
+            continue
+        input_state = replacement.get("input_state")
+        _check_block_id(input_state, f"{at}/input_state", issues)
+        if isinstance(input_state, str):
+            if input_state in seen_states:
+                issues.append(issue("error", "input_state_repeated", f"{at}/input_state", f"{input_state} is replaced twice"))
+            seen_states.add(input_state)
+
+        steps = replacement.get("output_steps")
+        if not isinstance(steps, list) or not steps:
+            issues.append(issue("error", "output_steps_empty", f"{at}/output_steps", f"{input_state} has no output_steps"))
+            continue
+
+        step_sum = 0.0
+        seen_outputs = set()
+        for j, step in enumerate(steps):
+            if not isinstance(step, dict):
+                issues.append(issue("error", "output_step", f"{at}/output_steps/{j}", "output step must be an object"))
+                continue
+            output_state = step.get("output_state")
+            _check_block_id(output_state, f"{at}/output_steps/{j}/output_state", issues)
+            if isinstance(output_state, str):
+                if output_state in seen_outputs:
+                    issues.append(issue("warning", "output_state_repeated", f"{at}/output_steps/{j}/output_state", f"{output_state} is listed twice"))
+                seen_outputs.add(output_state)
+
+            step_size = step.get("step_size")
+            if not _is_number(step_size) or not 0 <= step_size <= 1:
+                issues.append(issue("error", "step_size", f"{at}/output_steps/{j}/step_size", f"step_size must be in [0, 1], got {step_size!r}"))
+                continue
+            if step_size == 0:
+                # normalize_weights rounds shares under 0.0005 down to 0; such an output is never placed
+                issues.append(issue("warning", "step_size_zero", f"{at}/output_steps/{j}/step_size", f"{output_state} has step_size 0 and is never placed"))
+            step_sum += step_size
+
+        if abs(step_sum - 1.0) > step_sum_tolerance:
+            issues.append(issue("error", "step_sum", f"{at}/output_steps", f"step sizes of {input_state} add up to {step_sum:.4f}, not 1"))
+
+# Function: check_attachment
+# Purpose: Checks a wotr:attachment entry: side/up/down requirements, rarity and the attached block state
+# Input: Processor dictionary, its JSON pointer and the list to add issues to
+# Output: None
+def check_attachment(processor, pointer, issues):
+    sides = processor.get("requires_sides")
+    if not isinstance(sides, int) or isinstance(sides, bool) or not 0 <= sides <= 4:
+        issues.append(issue("error", "requires_sides", f"{pointer}/requires_sides", f"requires_sides must be a whole number from 0 to 4, got {sides!r}"))
+    for field in ("requires_up", "requires_down"):
+        if not isinstance(processor.get(field), bool):
+            issues.append(issue("error", field, f"{pointer}/{field}", f"{field} must be true or false"))
+    _check_rarity(processor, pointer, issues)
+
+    blockstate = processor.get("blockstate")
+    if not isinstance(blockstate, dict):
+        issues.append(issue("error", "blockstate", f"{pointer}/blockstate", "attachment has no blockstate"))
+        return
+    _check_block_id(blockstate.get("Name"), f"{pointer}/blockstate/Name", issues)
+    properties = blockstate.get("Properties", {})
+    if not isinstance(properties, dict) or not all(isinstance(k, str) and k and isinstance(v, str) and v for k, v in properties.items()):
+        issues.append(issue("error", "properties", f"{pointer}/blockstate/Properties", "Properties must map property names to values"))
+
+# Function: check_rift_chests
+# Purpose: Checks a wotr:rift_chests entry: loot table, rarity and chest type weights
+# Input: Processor dictionary, its JSON pointer and the list to add issues to
+# Output: None
+def check_rift_chests(processor, pointer, issues):
+    loot_table = processor.get("base_loot_table")
+    if not isinstance(loot_table, str) or ":" not in loot_table:
+        issues.append(issue("error", "base_loot_table", f"{pointer}/base_loot_table", f"base_loot_table must be a namespaced path, got {loot_table!r}"))
+    _check_rarity(processor, pointer, issues)
+
+    chest_types = processor.get("chest_types")
+    if not isinstance(chest_types, list) or not chest_types:
+        issues.append(issue("error", "chest_types_empty", f"{pointer}/chest_types", "rift_chests has no chest_types"))
+        return
+    for i, chest_type in enumerate(chest_types):
+        if not isinstance(chest_type, dict):
+            issues.append(issue("error", "chest_type", f"{pointer}/chest_types/{i}", "chest type must be an object"))
+            continue
+        if not isinstance(chest_type.get("chest_type"), str) or not chest_type.get("chest_type"):
+            issues.append(issue("error", "chest_type", f"{pointer}/chest_types/{i}/chest_type", "chest_type must be a name"))
+        weight = chest_type.get("weight")
+        if not isinstance(weight, int) or isinstance(weight, bool) or weight <= 0:
+            issues.append(issue("error", "chest_weight", f"{pointer}/chest_types/{i}/weight", f"weight must be a positive whole number, got {weight!r}"))
+
+# Function: check_rarity_only
+# Purpose: Checks processors that only take a rarity (wotr:mushrooms, wotr:vines)
+# Input: Processor dictionary, its JSON pointer and the list to add issues to
+# Output: None
+def check_rarity_only(processor, pointer, issues):
+    _check_rarity(processor, pointer, issues)
+
+# Rule set per processor_type
+processor_rules = {
+    "wotr:spot_gradient": check_spot_gradient,
+    "wotr:attachment": check_attachment,
+    "wotr:rift_chests": check_rift_chests,
+    "wotr:mushrooms": check_rarity_only,
+    "wotr:vines": check_rarity_only,
+}
+
+# Function: check_document
+# Purpose: Validates one processors document
+# Input: Parsed document
+# Output: List of issue dictionaries
+def check_document(document):
+    issues = []
+    processors = document.get("processors") if isinstance(document, dict) else None
+    if not isinstance(processors, list) or not processors:
+        return [issue("error", "processors_empty", "/processors", "document has no processors list")]
+
+    spot_gradients = 0
+    for i, processor in enumerate(processors):
+        pointer = f"/processors/{i}"
+        processor_type = processor.get("processor_type") if isinstance(processor, dict) else None
+        rule = processor_rules.get(processor_type)
+        if rule is None:
+            issues.append(issue("warning", "processor_type", f"{pointer}/processor_type", f"no rules for processor_type {processor_type!r}"))
+            continue
+        spot_gradients += processor_type == "wotr:spot_gradient"
+        rule(processor, pointer, issues)
+
+    if spot_gradients != 1:
+        issues.append(issue("error", "spot_gradient_count", "/processors", f"expected one wotr:spot_gradient, found {spot_gradients}"))
+    return issues
+
+# Function: check_content
+# Purpose: Parses and validates one document's bytes; the unit of work of the parallel sweep
+# Input: Tuple of (label naming the file or archive member, raw JSON bytes, True when found by sweeping a folder)
+# Output: Tuple of (label, list of issues), with None instead of the issues for swept JSON that is not a processor list
+def check_content(task):
+    label, content, swept = task
+    try:
+        document = json.loads(content)
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        return label, [issue("error", "json", "", f"not valid JSON: {e}")]
+    if swept and not (isinstance(document, dict) and "processors" in document):
+        # Catalog manifests, metrics snapshots and other JSON living next to the processor lists
+        return label, None
+    return label, check_document(document)
+
+# Function: collect_documents
+# Purpose: Finds processor documents in files, folders and data pack zips
+# Input: List of paths
+# Output: Generator of (label, raw JSON bytes, True when the file was found by sweeping a folder)
+def collect_documents(paths):
+    """Files named directly are always checked. JSON files found in a folder are only checked
+    when they hold a top-level processors list, so manifests and snapshots next to them are skipped.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, folder_names, file_names in os.walk(path):
+                folder_names.sort()
+                for file_name in sorted(file_names):
+                    file_path = os.path.join(folder, file_name)
+                    if file_name.endswith(".json"):
+                        with open(file_path, "rb") as f:
+                            yield file_path, f.read(), True
+                    elif file_name.endswith(".zip"):
+                        yield from collect_documents([file_path])
+        elif path.endswith(".zip"):
+            with zipfile.ZipFile(path) as archive:
+                for member in sorted(archive.namelist()):
+                    if datapack_member_pattern.fullmatch(member):
+                        yield f"{path}!{member}", archive.read(member), False
+        else:
+            with open(path, "rb") as f:
+                yield path, f.read(), False
+
+# Function: check_paths
+# Purpose: Validates every processor document under the given paths, spreading the work over processes
+# Input: List of paths and the number of worker processes (1 checks in this process)
+# Output: Dictionary of label -> list of issues, in the order the documents were found
+def check_paths(paths, jobs=None):
+    tasks = list(collect_documents(paths))
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(tasks) < 2 * jobs:
+        results = map(check_content, tasks)
+        return {label: issues for label, issues in results if issues is not None}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(check_content, tasks, chunksize=max(1, len(tasks) // (jobs * 4)))
+        return {label: issues for label, issues in results if issues is not None}
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate generated processor lists (JSON files, folders or data pack zips).")
+    parser.add_argument("paths", nargs="+", help="Processor JSON files, folders to search, or data pack zips")
+    parser.add_argument("-j", "--jobs", type=int, help="Worker processes, defaults to the number of CPUs")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    results = check_paths(args.paths, args.jobs)
+    errors = sum(1 for issues in results.values() for found in issues if found["severity"] == "error")
+    warnings = sum(1 for issues in results.values() for found in issues if found["severity"] == "warning")
+
+    if args.json:
+        report = {
+            "documents": len(results),
+            "errors": errors,
+            "warnings": warnings,
+            "issues": [dict(found, document=label) for label, issues in results.items() for found in issues],
+        }
+        print(json.dumps(report, indent=2))
+    else:
+        for label, issues in results.items():
+            for found in issues:
+                print(f"{'❌' if found['severity'] == 'error' else '⚠️'} {label}{found['pointer']}: {found['message']}")
+        print(f"{'✅' if not errors else '⚠️'} {len(results)} documents, {errors} errors, {warnings} warnings")
+
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import sys
+import numpy as np
+
+# Name used for palette indices that have no palette entry
+unknown_block = "unknown"
+
+# Function: decode_block_data
+# Purpose: Decodes a Sponge BlockData varint byte array into palette indices
+# Input: BlockData bytes (any integer array or bytes object) and the expected voxel count
+# Output: NumPy int32 array of palette indices, one per voxel in y, z, x order
+def decode_block_data(block_data, voxel_count):
+    raw = np.frombuffer(bytes(block_data), dtype=np.uint8) if isinstance(block_data, (bytes, bytearray)) \
+        else np.asarray(block_data).astype(np.uint8, copy=False)
+
+    continuation = raw >= 0x80
+    if not continuation.any():
+        # Palettes under 128 entries store one byte per voxel
+        indices = raw.astype(np.int32)
+    else:
+        # Each varint ends on a byte without the continuation bit
+        ends = np.flatnonzero(~continuation)
+        if len(ends) == 0:
+            indices = np.empty(0, dtype=np.int32)
+        else:
+            raw = raw[:ends[-1] + 1]  # Drop a truncated trailing varint
+            starts = np.concatenate(([0], ends[:-1] + 1))
+            position = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+            contributions = (raw & 0x7F).astype(np.int64) << (7 * position)
+            indices = np.add.reduceat(contributions, starts).astype(np.int32)
+
+    if len(indices) != voxel_count:
+        raise ValueError(f"BlockData holds {len(indices)} blocks but the schematic size needs {voxel_count}")
+    return indices
+
+# Class: PaletteTables
+# Purpose: Dense lookup tables compiled from a schematic palette so per-voxel work is array indexing
+class PaletteTables:
+    __slots__ = ("block_names", "block_ids", "ignored", "placeholder")
+
+    def __init__(self, block_names, block_ids, ignored, placeholder):
+        self.block_names = block_names  # Interned id -> block name without properties
+        self.block_ids = block_ids      # Palette index -> interned id
+        self.ignored = ignored          # Palette index -> block is in the ignore list
+        self.placeholder = placeholder  # Palette index -> block is a wotr:processor_block_N* placeholder
+
+    def names_for(self, palette_indices):
+        """Block names for an array of palette indices, as a list."""
+        return np.asarray(self.block_names, dtype=object)[self.block_ids[palette_indices]].tolist()
+
+# Function: compile_palette
+# Purpose: Compiles a palette mapping into dense index -> id, ignored and placeholder tables
+# Input: Mapping of block state string -> palette index, set of ignored block names, and the largest index in the data
+# Output: PaletteTables
+def compile_palette(palette, ignored_blocks, max_index=0):
+    """Compiles a palette into dense lookup tables.
+
+    Block states that only differ in their properties ([facing=north] and so on) share one
+    interned id. Indices with no palette entry map to "unknown", like the old dict lookup did.
+    """
+    size = max([max_index, *palette.values()], default=-1) + 1
+    block_names = [unknown_block]
+    name_ids = {unknown_block: 0}
+    block_ids = np.zeros(size, dtype=np.int32)
+
+    for state, palette_index in palette.items():
+        name = sys.intern(state.split("[")[0])
+        block_id = name_ids.get(name)
+        if block_id is None:
+            block_id = name_ids[name] = len(block_names)
+            block_names.append(name)
+        block_ids[palette_index] = block_id
+
+    name_ignored = np.array([name in ignored_blocks for name in block_names], dtype=bool)
+    name_placeholder = np.array([name.startswith("wotr:processor_block_") for name in block_names], dtype=bool)
+
+    return PaletteTables(
+        block_names=tuple(block_names),
+        block_ids=block_ids,
+        ignored=name_ignored[block_ids],
+        placeholder=name_placeholder[block_ids],
+    )
+
+# Function: encode_block_data
+# Purpose: Encodes palette indices as a Sponge BlockData varint byte array
+# Input: Array of palette indices in y, z, x order
+# Output: NumPy int8 array ready to store in a ByteArrayTag
+def encode_block_data(palette_indices):
+    values = np.asarray(palette_indices, dtype=np.int64).ravel()
+    if len(values) == 0 or values.max() < 0x80:
+        return values.astype(np.int8)
+
+    # Bytes needed per value: one per started group of 7 bits
+    byte_counts = np.ones(len(values), dtype=np.int64)
+    remaining = values >> 7
+    while remaining.any():
+        byte_counts += remaining > 0
+        remaining >>= 7
+
+    value_of_byte = np.repeat(np.arange(len(values)), byte_counts)
+    position = np.arange(int(byte_counts.sum())) - np.repeat(np.cumsum(byte_counts) - byte_counts, byte_counts)
+    encoded = (values[value_of_byte] >> (7 * position)) & 0x7F
+    # Every byte except the last one of a value carries the continuation bit
+    encoded |= np.where(position < byte_counts[value_of_byte] - 1, 0x80, 0)
+    return encoded.astype(np.uint8).view(np.int8)
@@ -0,0 +1,274 @@
+import os
+from typing import NamedTuple, Optional
+import numpy as np
+from amulet_nbt import load, CompoundTag
+from schem_decode import decode_block_data
+
+# Class: SchematicData
+# Purpose: A schematic decoded into one flat palette-index array, whatever format it came from
+class SchematicData(NamedTuple):
+    width: int
+    height: int
+    length: int
+    palette: dict            # Block state string -> palette index
+    block_data: np.ndarray   # Palette index per voxel, x fastest, then z, then y
+    data_version: Optional[int] = None
+
+# Registry of file extension -> reader function, in lookup order
+readers = {}
+
+# Function: register_reader
+# Purpose: Decorator that registers a reader for a file extension
+# Input: File extension including the dot, e.g. ".schem"
+# Output: Decorator returning the function unchanged
+def register_reader(extension):
+    def decorator(reader):
+        readers[extension] = reader
+        return reader
+    return decorator
+
+# Function: schematic_extensions
+# Purpose: Lists the file extensions that have a registered reader
+# Input: None
+# Output: Tuple of extensions in lookup order
+def schematic_extensions():
+    return tuple(readers)
+
+# Function: read_schematic
+# Purpose: Reads any supported schematic file into SchematicData
+# Input: Path to the file, or raw file bytes together with a name carrying the extension
+# Output: SchematicData
+def read_schematic(source, name=None):
+    extension = os.path.splitext(name or source)[1].lower()
+    reader = readers.get(extension)
+    if reader is None:
+        raise ValueError(f"No schematic reader for '{extension}' files (supported: {', '.join(readers)})")
+    return reader(load(source).compound)
+
+def _block_state(name, properties):
+    if not properties:
+        return name
+    return f"{name}[{','.join(f'{key}={value}' for key, value in properties.items())}]"
+
+# Function: read_sponge
+# Purpose: Reads Sponge v1/v2 (top-level Palette/BlockData) and v3 (Blocks sub-compound) schematics
+# Input: Root CompoundTag
+# Output: SchematicData
+@register_reader(".schem")
+def read_sponge(compound: CompoundTag):
+    # Version 3 files nest everything in a "Schematic" compound
+    if "Schematic" in compound and isinstance(compound["Schematic"], CompoundTag):
+        compound = compound["Schematic"]
+
+    width = compound["Width"].py_data
+    height = compound["Height"].py_data
+    length = compound["Length"].py_data
+
+    if "Blocks" in compound:
+        blocks = compound["Blocks"]
+        palette_tag, data_tag = blocks["Palette"], blocks["Data"]
+    else:
+        palette_tag, data_tag = compound["Palette"], compound["BlockData"]
+
+    palette = {state: index.py_data for state, index in palette_tag.items()}
+    block_data = decode_block_data(data_tag.py_data, width * height * length)
+    data_version = compound["DataVersion"].py_data if "DataVersion" in compound else None
+    return SchematicData(width, height, length, palette, block_data, data_version)
+
+# The 16 colours of wool, terracotta, glass, carpet and concrete, in data value order
+legacy_colours = (
+    "white", "orange", "magenta", "light_blue", "yellow", "lime", "pink", "gray",
+    "light_gray", "cyan", "purple", "blue", "brown", "green", "red", "black",
+)
+
+def _coloured(suffix):
+    return tuple(f"minecraft:{colour}_{suffix}" for colour in legacy_colours)
+
+# Pre-1.13 blocks that are commonly used in templates: numeric id -> (registry name, data mask, flattened
+# names indexed by data value & mask). Anything else becomes legacy:<id>
+legacy_blocks = {
+    0: ("minecraft:air", 0, ("minecraft:air",)),
+    1: ("minecraft:stone", 7, (
+        "minecraft:stone", "minecraft:granite", "minecraft:polished_granite", "minecraft:diorite",
+        "minecraft:polished_diorite", "minecraft:andesite", "minecraft:polished_andesite")),
+    2: ("minecraft:grass", 0, ("minecraft:grass_block",)),
+    3: ("minecraft:dirt", 3, ("minecraft:dirt", "minecraft:coarse_dirt", "minecraft:podzol")),
+    4: ("minecraft:cobblestone", 0, ("minecraft:cobblestone",)),
+    5: ("minecraft:planks", 7, (
+        "minecraft:oak_planks", "minecraft:spruce_planks", "minecraft:birch_planks",
+        "minecraft:jungle_planks", "minecraft:acacia_planks", "minecraft:dark_oak_planks")),
+    7: ("minecraft:bedrock", 0, ("minecraft:bedrock",)),
+    8: ("minecraft:flowing_water", 0, ("minecraft:water",)),
+    9: ("minecraft:water", 0, ("minecraft:water",)),
+    10: ("minecraft:flowing_lava", 0, ("minecraft:lava",)),
+    11: ("minecraft:lava", 0, ("minecraft:lava",)),
+    12: ("minecraft:sand", 1, ("minecraft:sand", "minecraft:red_sand")),
+    13: ("minecraft:gravel", 0, ("minecraft:gravel",)),
+    14: ("minecraft:gold_ore", 0, ("minecraft:gold_ore",)),
+    15: ("minecraft:iron_ore", 0, ("minecraft:iron_ore",)),
+    16: ("minecraft:coal_ore", 0, ("minecraft:coal_ore",)),
+    17: ("minecraft:log", 3, ("minecraft:oak_log", "minecraft:spruce_log", "minecraft:birch_log", "minecraft:jungle_log")),
+    18: ("minecraft:leaves", 3, ("minecraft:oak_leaves", "minecraft:spruce_leaves", "minecraft:birch_leaves", "minecraft:jungle_leaves")),
+    19: ("minecraft:sponge", 1, ("minecraft:sponge", "minecraft:wet_sponge")),
+    20: ("minecraft:glass", 0, ("minecraft:glass",)),
+    24: ("minecraft:sandstone", 3, ("minecraft:sandstone", "minecraft:chiseled_sandstone", "minecraft:cut_sandstone")),
+    35: ("minecraft:wool", 15, _coloured("wool")),
+    44: ("minecraft:stone_slab", 7, (
+        "minecraft:smooth_stone_slab", "minecraft:sandstone_slab", "minecraft:petrified_oak_slab",
+        "minecraft:cobblestone_slab", "minecraft:brick_slab", "minecraft:stone_brick_slab",
+        "minecraft:nether_brick_slab", "minecraft:quartz_slab")),
+    45: ("minecraft:brick_block", 0, ("minecraft:bricks",)),
+    48: ("minecraft:mossy_cobblestone", 0, ("minecraft:mossy_cobblestone",)),
+    49: ("minecraft:obsidian", 0, ("minecraft:obsidian",)),
+    67: ("minecraft:stone_stairs", 0, ("minecraft:cobblestone_stairs",)),
+    80: ("minecraft:snow", 0, ("minecraft:snow_block",)),
+    82: ("minecraft:clay", 0, ("minecraft:clay",)),
+    87: ("minecraft:netherrack", 0, ("minecraft:netherrack",)),
+    88: ("minecraft:soul_sand", 0, ("minecraft:soul_sand",)),
+    89: ("minecraft:glowstone", 0, ("minecraft:glowstone",)),
+    95: ("minecraft:stained_glass", 15, _coloured("stained_glass")),
+    98: ("minecraft:stonebrick", 3, (
+        "minecraft:stone_bricks", "minecraft:mossy_stone_bricks", "minecraft:cracked_stone_bricks",
+        "minecraft:chiseled_stone_bricks")),
+    109: ("minecraft:stone_brick_stairs", 0, ("minecraft:stone_brick_stairs",)),
+    112: ("minecraft:nether_brick", 0, ("minecraft:nether_bricks",)),
+    121: ("minecraft:end_stone", 0, ("minecraft:end_stone",)),
+    126: ("minecraft:wooden_slab", 7, (
+        "minecraft:oak_slab", "minecraft:spruce_slab", "minecraft:birch_slab",
+        "minecraft:jungle_slab", "minecraft:acacia_slab", "minecraft:dark_oak_slab")),
+    139: ("minecraft:cobblestone_wall", 1, ("minecraft:cobblestone_wall", "minecraft:mossy_cobblestone_wall")),
+    155: ("minecraft:quartz_block", 7, (
+        "minecraft:quartz_block", "minecraft:chiseled_quartz_block",
+        "minecraft:quartz_pillar", "minecraft:quartz_pillar", "minecraft:quartz_pillar")),
+    159: ("minecraft:stained_hardened_clay", 15, _coloured("terracotta")),
+    160: ("minecraft:stained_glass_pane", 15, _coloured("stained_glass_pane")),
+    161: ("minecraft:leaves2", 1, ("minecraft:acacia_leaves", "minecraft:dark_oak_leaves")),
+    162: ("minecraft:log2", 1, ("minecraft:acacia_log", "minecraft:dark_oak_log")),
+    168: ("minecraft:prismarine", 3, ("minecraft:prismarine", "minecraft:prismarine_bricks", "minecraft:dark_prismarine")),
+    171: ("minecraft:carpet", 15, _coloured("carpet")),
+    172: ("minecraft:hardened_clay", 0, ("minecraft:terracotta",)),
+    179: ("minecraft:red_sandstone", 3, ("minecraft:red_sandstone", "minecraft:chiseled_red_sandstone", "minecraft:cut_red_sandstone")),
+    251: ("minecraft:concrete", 15, _coloured("concrete")),
+    252: ("minecraft:concrete_powder", 15, _coloured("concrete_powder")),
+}
+
+# Pre-1.13 registry name -> numeric id, for files that carry their own id table
+legacy_name_ids = {name: block_id for block_id, (name, _, _) in legacy_blocks.items()}
+
+# Function: legacy_block_name
+# Purpose: Gives the flattened block name of a pre-1.13 (id, data) pair
+# Input: Block id, data value and the file's own id -> registry name table
+# Output: Block name, e.g. minecraft:mossy_stone_bricks for (98, 1)
+def legacy_block_name(block_id, data, id_names):
+    name = id_names.get(block_id)
+    if name is not None:
+        # Names of blocks this table does not know (mods, already flattened names) are kept as they are
+        if name not in legacy_name_ids:
+            return name
+        block_id = legacy_name_ids[name]
+    if block_id not in legacy_blocks:
+        return f"legacy:{block_id}"
+    _, mask, names = legacy_blocks[block_id]
+    variant = data & mask
+    return names[variant] if variant < len(names) else names[0]
+
+# Function: read_mcedit
+# Purpose: Reads legacy MCEdit/Schematica .schematic files (numeric Blocks/Data/AddBlocks arrays)
+# Input: Root CompoundTag
+# Output: SchematicData
+@register_reader(".schematic")
+def read_mcedit(compound: CompoundTag):
+    """Reads a legacy .schematic file.
+
+    Before 1.13 the data value picked the variant of many blocks: wool, terracotta and glass
+    colours, plank and log woods, granite/diorite/andesite under stone, mossy and cracked stone
+    bricks. Each (id, data) pair is mapped to its flattened name through legacy_blocks; ids are
+    first translated through the file's own SchematicaMapping or BlockIDs table when it has one.
+    Data bits that only encode properties (facing, axis, slab half) are masked off, so those
+    blocks share one palette entry.
+    """
+    width = compound["Width"].py_data
+    height = compound["Height"].py_data
+    length = compound["Length"].py_data
+    voxel_count = width * height * length
+
+    block_ids = np.asarray(compound["Blocks"].py_data).astype(np.uint8).astype(np.int32)[:voxel_count]
+    if "AddBlocks" in compound:
+        # Extra 4 high bits per block, two blocks per byte (high nibble first)
+        add = np.asarray(compound["AddBlocks"].py_data).astype(np.uint8)
+        nibbles = np.stack([add >> 4, add & 0x0F], axis=1).ravel()[:voxel_count].astype(np.int32)
+        block_ids |= nibbles << 8
+    if "Data" in compound:
+        data_values = np.asarray(compound["Data"].py_data).astype(np.uint8).astype(np.int32)[:voxel_count] & 0x0F
+    else:
+        data_values = np.zeros(voxel_count, dtype=np.int32)
+
+    id_names = {}
+    if "SchematicaMapping" in compound:
+        id_names = {tag.py_data: name for name, tag in compound["SchematicaMapping"].items()}
+    elif "BlockIDs" in compound:
+        id_names = {int(block_id): tag.py_data for block_id, tag in compound["BlockIDs"].items()}
+
+    used_keys, block_data = np.unique((block_ids << 4) | data_values, return_inverse=True)
+    palette = {}
+    remap = np.empty(len(used_keys), dtype=np.int32)
+    for i, key in enumerate(used_keys.tolist()):
+        name = legacy_block_name(key >> 4, key & 0x0F, id_names)
+        remap[i] = palette.setdefault(name, len(palette))
+    return SchematicData(width, height, length, palette, remap[block_data.reshape(-1)].astype(np.int32))
+
+# Function: unpack_litematica_states
+# Purpose: Unpacks Litematica's bit-packed block state array (entries may span two longs)
+# Input: LongArray values, number of entries and the palette size
+# Output: NumPy int32 array of palette indices
+def unpack_litematica_states(longs, entry_count, palette_size):
+    bits = max(2, int(palette_size - 1).bit_length())
+    words = np.asarray(longs).astype(np.int64).view(np.uint64)
+    words = np.concatenate((words, np.zeros(1, dtype=np.uint64)))  # Lets the last entry read a "next" word
+
+    start_bit = np.arange(entry_count, dtype=np.uint64) * np.uint64(bits)
+    word = (start_bit >> np.uint64(6)).astype(np.int64)
+    offset = start_bit & np.uint64(63)
+
+    low = words[word] >> offset
+    # Bits carried over from the next long; shifting by 64 is undefined, so entries at offset 0 take none
+    spill = np.where(offset == 0, np.uint64(0), words[word + 1] << ((np.uint64(64) - offset) & np.uint64(63)))
+    mask = np.uint64((1 << bits) - 1)
+    return ((low | spill) & mask).astype(np.int32)
+
+# Function: read_litematica
+# Purpose: Reads Litematica .litematic files, merging all regions into one volume
+# Input: Root CompoundTag
+# Output: SchematicData
+@register_reader(".litematic")
+def read_litematica(compound: CompoundTag):
+    regions = []
+    for region in compound["Regions"].values():
+        position = [region["Position"][axis].py_data for axis in "xyz"]
+        size = [region["Size"][axis].py_data for axis in "xyz"]
+        # Negative sizes extend from the position towards negative coordinates
+        origin = [p + s + 1 if s < 0 else p for p, s in zip(position, size)]
+        regions.append((origin, [abs(s) for s in size], region))
+
+    minimum = [min(r[0][axis] for r in regions) for axis in range(3)]
+    maximum = [max(r[0][axis] + r[1][axis] for r in regions) for axis in range(3)]
+    width, height, length = (maximum[axis] - minimum[axis] for axis in range(3))
+
+    palette = {"minecraft:air": 0}
+    block_data = np.zeros((height, length, width), dtype=np.int32)
+    for origin, (size_x, size_y, size_z), region in regions:
+        states = [
+            _block_state(entry["Name"].py_data, {k: v.py_data for k, v in entry["Properties"].items()} if "Properties" in entry else None)
+            for entry in region["BlockStatePalette"]
+        ]
+        remap = np.array([palette.setdefault(state, len(palette)) for state in states], dtype=np.int32)
+        local = unpack_litematica_states(region["BlockStates"].py_data, size_x * size_y * size_z, len(states))
+        x0, y0, z0 = (origin[axis] - minimum[axis] for axis in range(3))
+        volume = remap[local].reshape(size_y, size_z, size_x)
+        # Air in a region does not overwrite blocks another region placed
+        target = block_data[y0:y0 + size_y, z0:z0 + size_z, x0:x0 + size_x]
+        placed = volume != 0
+        target[placed] = volume[placed]
+
+    data_version = compound["MinecraftDataVersion"].py_data if "MinecraftDataVersion" in compound else None
+    return SchematicData(width, height, length, palette, block_data.reshape(-1), data_version)
@@ -0,0 +1,215 @@
+import os
+import re
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import numpy as np
+from amulet_nbt import CompoundTag, NamedTag, ByteArrayTag, IntTag, ShortTag, IntArrayTag
+from schem_decode import encode_block_data
+from schematic_readers import read_schematic
+from block_families import classify_block_state
+
+# DataVersion written when the source format does not record one (1.20.4)
+default_data_version = 3700
+
+# Function: value_noise_3d
+# Purpose: Evaluates smooth 3D value noise in [0, 1) for a batch of points
+# Input: Arrays of x, y, z sample coordinates (already multiplied by the noise scales) and a seed
+# Output: NumPy float64 array of noise values, one per point
+def value_noise_3d(x, y, z, seed=0):
+    """Trilinearly interpolated lattice noise, evaluated for all points at once.
+
+    This approximates the look of wotr:spot_gradient; it is not the mod's exact noise function,
+    so the preview shows patch size and block mix rather than the exact in-game placement.
+    """
+    cell = [np.floor(c).astype(np.int64) for c in (x, y, z)]
+    # Smoothstep weights inside each lattice cell
+    fade = [(c - f) * (c - f) * (3.0 - 2.0 * (c - f)) for c, f in zip((x, y, z), cell)]
+
+    def lattice(ix, iy, iz):
+        h = (ix * 73856093) ^ (iy * 19349663) ^ (iz * 83492791) ^ (seed * 2654435761)
+        h = (h ^ (h >> 13)) * 1274126177
+        h ^= h >> 16
+        return (h & 0xFFFFFF) / float(0x1000000)
+
+    result = 0.0
+    for dx in (0, 1):
+        wx = fade[0] if dx else 1.0 - fade[0]
+        for dy in (0, 1):
+            wy = fade[1] if dy else 1.0 - fade[1]
+            for dz in (0, 1):
+                wz = fade[2] if dz else 1.0 - fade[2]
+                result = result + wx * wy * wz * lattice(cell[0] + dx, cell[1] + dy, cell[2] + dz)
+    return np.clip(result, 0.0, np.nextafter(1.0, 0.0))
+
+# Function: uniform_ranks
+# Purpose: Turns noise values into evenly spread values in (0, 1) that keep their order
+# Input: NumPy array of noise values
+# Output: NumPy float64 array of the same length
+def uniform_ranks(noise):
+    """Empirical CDF transform: each value becomes its rank, scaled into (0, 1).
+
+    Interpolated lattice noise clusters around 0.5, so comparing it directly with cumulative
+    step_size thresholds would starve the first and last steps. Ranks are spread evenly, so a
+    step of size p covers a share p of the voxels while the patches stay where the noise put them.
+    """
+    ranks = np.empty(len(noise), dtype=np.float64)
+    ranks[np.argsort(noise, kind="stable")] = np.arange(len(noise))
+    return (ranks + 0.5) / max(len(noise), 1)
+
+# Shape suffix of a placeholder block, e.g. "_stairs" for wotr:processor_block_3_stairs
+placeholder_pattern = re.compile(r"wotr:processor_block_\d+(.*)")
+
+# Function: find_spot_gradient
+# Purpose: Finds the wotr:spot_gradient processor in a processors document
+# Input: Processors document as written by process_csv_to_json
+# Output: The spot_gradient processor dictionary
+def find_spot_gradient(document):
+    for processor in document.get("processors", []):
+        if processor.get("processor_type") == "wotr:spot_gradient":
+            return processor
+    raise ValueError("The document has no wotr:spot_gradient processor")
+
+# Function: simulate_spot_gradient
+# Purpose: Replaces processor placeholders in a room volume the way spot_gradient does
+# Input: spot_gradient processor, palette {block state: index}, decoded block data, room size and a seed
+# Output: Tuple of (new palette {block state: index}, new palette indices in y, z, x order)
+def simulate_spot_gradient(spot_gradient, palette, block_data, width, height, length, seed=0):
+    steps_by_state = {
+        replacement["input_state"]: replacement["output_steps"]
+        for replacement in spot_gradient.get("replacements", [])
+        if replacement.get("output_steps")
+    }
+    max_steps = max((len(steps) for steps in steps_by_state.values()), default=1)
+
+    # Per source palette entry: candidate output palette ids and cumulative step thresholds. Entry i's
+    # thresholds are stored as 2 * i + threshold in one sorted array, so one searchsorted covers every voxel
+    size = max([int(block_data.max(initial=0)), *palette.values()]) + 1
+    output_ids = np.zeros((size, max_steps), dtype=np.int64)
+    thresholds = [np.empty(0)] * size
+    new_palette = {}
+
+    def palette_id(state):
+        return new_palette.setdefault(state, len(new_palette))
+
+    for state, index in palette.items():
+        name, bracket, properties = state.partition("[")
+        steps = steps_by_state.get(name)
+        if not steps:
+            output_ids[index, :] = palette_id(state)
+            continue
+        total = sum(step["step_size"] for step in steps)
+        cumulative = np.cumsum([step["step_size"] for step in steps]) / total
+        placeholder = placeholder_pattern.fullmatch(name)
+        shape = placeholder.group(1) if placeholder else ""
+        for i, step in enumerate(steps):
+            # Outputs of the placeholder's own shape keep its properties (facing, half, ...);
+            # others (water in a pillar column, say) would become invalid block states
+            keeps_properties = shape and classify_block_state(step["output_state"])[1] == shape
+            output_ids[index, i] = palette_id(step["output_state"] + (bracket + properties if keeps_properties else ""))
+        thresholds[index] = 2 * index + cumulative[:-1]
+
+    y, rest = np.divmod(np.arange(len(block_data)), length * width)
+    z, x = np.divmod(rest, width)
+    noise = uniform_ranks(value_noise_3d(
+        x * spot_gradient.get("noise_scale_x", 0.075),
+        y * spot_gradient.get("noise_scale_y", 0.075),
+        z * spot_gradient.get("noise_scale_z", 0.075),
+        seed,
+    ))
+    # Step index = number of the entry's cumulative thresholds the noise value has passed
+    first_threshold = np.cumsum([0] + [len(entry) for entry in thresholds[:-1]])
+    step = np.searchsorted(np.concatenate(thresholds), 2 * block_data + noise, side="right") - first_threshold[block_data]
+    return new_palette, output_ids[block_data, step]
+
+# Function: save_schematic
+# Purpose: Writes a Sponge v2 schematic
+# Input: Output path, source SchematicData (for size and DataVersion), palette {block state: index} and palette indices
+# Output: None
+def save_schematic(path, source, palette, block_data):
+    compound = CompoundTag()
+    compound["Version"] = IntTag(2)
+    compound["DataVersion"] = IntTag(source.data_version or default_data_version)
+    compound["Width"] = ShortTag(source.width)
+    compound["Height"] = ShortTag(source.height)
+    compound["Length"] = ShortTag(source.length)
+    compound["Offset"] = IntArrayTag([0, 0, 0])
+    compound["Palette"] = CompoundTag({state: IntTag(index) for state, index in palette.items()})
+    compound["PaletteMax"] = IntTag(len(palette))
+    compound["BlockData"] = ByteArrayTag(encode_block_data(block_data))
+    NamedTag(compound, "Schematic").save_to(path, compressed=True)
+
+def block_colour(state):
+    """Stable colour per block name; air is left white."""
+    name = state.split("[")[0]
+    if name in ("minecraft:air", "minecraft:void_air", "minecraft:cave_air"):
+        return (255, 255, 255)
+    digest = hashlib.md5(name.encode("utf-8")).digest()
+    return tuple(64 + b % 160 for b in digest[:3])
+
+def write_png(path, rgb):
+    """Writes an (h, w, 3) uint8 array as a PNG using only the standard library."""
+    height, width, _ = rgb.shape
+    raw = b"".join(b"\x00" + rgb[row].tobytes() for row in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+# Function: save_layer_images
+# Purpose: Writes one top-down PNG per Y layer of the simulated room
+# Input: Output folder, palette {block state: index}, palette indices, room size and pixels per block
+# Output: List of written image paths
+def save_layer_images(output_folder, palette, block_data, width, height, length, pixels_per_block=8):
+    os.makedirs(output_folder, exist_ok=True)
+    colours = np.zeros((max(palette.values(), default=0) + 1, 3), dtype=np.uint8)
+    for state, index in palette.items():
+        colours[index] = block_colour(state)
+
+    volume = colours[block_data.reshape(height, length, width)]
+    written = []
+    for y in range(height):
+        layer = np.repeat(np.repeat(volume[y], pixels_per_block, axis=0), pixels_per_block, axis=1)
+        path = os.path.join(output_folder, f"layer_{y:03d}.png")
+        write_png(path, np.ascontiguousarray(layer))
+        written.append(path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Preview a generated spot_gradient on a room of processor placeholders.")
+    parser.add_argument("document", help="Processors JSON written by the generator")
+    parser.add_argument("room", help="Room schematic (.schem, .schematic or .litematic) built from wotr:processor_block_N placeholders")
+    parser.add_argument("-o", "--output", help="Write the result as a .schem file")
+    parser.add_argument("--layers", help="Write one PNG per Y layer into this folder")
+    parser.add_argument("--noise-scale", type=float, nargs=3, metavar=("X", "Y", "Z"), help="Override the document's noise scales")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not args.output and not args.layers:
+        parser.error("Choose at least one of --output or --layers")
+
+    with open(args.document, encoding="utf-8") as f:
+        spot_gradient = dict(find_spot_gradient(json.load(f)))
+    if args.noise_scale:
+        spot_gradient["noise_scale_x"], spot_gradient["noise_scale_y"], spot_gradient["noise_scale_z"] = args.noise_scale
+
+    room = read_schematic(args.room)
+    width, height, length = room.width, room.height, room.length
+
+    new_palette, new_block_data = simulate_spot_gradient(spot_gradient, room.palette, room.block_data, width, height, length, args.seed)
+
+    if args.output:
+        save_schematic(args.output, room, new_palette, new_block_data)
+        print(f"✅ Exported: {args.output}")
+    if args.layers:
+        written = save_layer_images(args.layers, new_palette, new_block_data, width, height, length)
+        print(f"✅ Exported {len(written)} layer images to {args.layers}")
+
+if __name__ == "__main__":
+    main()
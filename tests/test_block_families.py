@@ -0,0 +1,28 @@
+import pytest
+from block_families import classify_block_state, shape_endings, shapes, special_blocks
+
+def test_shape_ids_follow_the_template_columns():
+    assert shapes[:12] == (
+        "", "_directional_pillar", "_slab", "_stairs", "_wall", "_button", "_pressure_plate",
+        "_fence", "_fence_gate", "_glass", "_glass_pane", "_trapdoor",
+    )
+
+def test_every_classified_shape_has_an_id():
+    assert set(shape_endings) <= set(shapes)
+    assert {shape for _, shape in special_blocks.values()} <= set(shapes)
+
+@pytest.mark.parametrize("state, expected", [
+    ("minecraft:oak_planks", ("minecraft:oak", "")),
+    ("minecraft:oak_fence_gate[facing=north]", ("minecraft:oak", "_fence_gate")),
+    ("minecraft:oak_fence", ("minecraft:oak", "_fence")),
+    ("minecraft:oak_trapdoor", ("minecraft:oak", "_trapdoor")),
+    ("minecraft:oak_door[half=lower]", ("minecraft:oak", "_door")),
+    ("minecraft:stripped_oak_log[axis=y]", ("minecraft:oak", "_directional_pillar")),
+    ("minecraft:stone_bricks", ("minecraft:stone_brick", "")),
+    ("minecraft:stone_brick_stairs", ("minecraft:stone_brick", "_stairs")),
+    ("minecraft:bricks", ("minecraft:brick", "")),
+    ("minecraft:brick_wall", ("minecraft:brick", "_wall")),
+    ("minecraft:glass_pane", ("minecraft:glass", "_glass_pane")),
+])
+def test_classify_block_state(state, expected):
+    assert classify_block_state(state) == expected
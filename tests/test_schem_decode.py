@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from schem_decode import compile_palette, decode_block_data, encode_block_data
+
+# Values either side of every varint byte boundary up to a 3 million entry palette
+boundary_values = [0, 1, 127, 128, 255, 16383, 16384, 2097151, 2097152, 2999999]
+
+def test_single_byte_palette_round_trip():
+    values = np.random.default_rng(0).integers(0, 128, size=5000)
+    encoded = encode_block_data(values)
+    assert len(encoded) == len(values)
+    np.testing.assert_array_equal(decode_block_data(encoded, len(values)), values)
+
+def test_boundary_values_round_trip():
+    encoded = encode_block_data(boundary_values)
+    np.testing.assert_array_equal(decode_block_data(encoded, len(boundary_values)), boundary_values)
+
+@pytest.mark.parametrize("palette_size", [200, 20000, 3000000])
+def test_large_palette_round_trip(palette_size):
+    rng = np.random.default_rng(palette_size)
+    values = rng.integers(0, palette_size, size=200000)
+    values[:3] = (0, 127, palette_size - 1)
+    decoded = decode_block_data(encode_block_data(values), len(values))
+    assert decoded.dtype == np.int32
+    np.testing.assert_array_equal(decoded, values)
+
+def test_decodes_bytes_objects():
+    encoded = encode_block_data(boundary_values)
+    decoded = decode_block_data(encoded.tobytes(), len(boundary_values))
+    np.testing.assert_array_equal(decoded, boundary_values)
+
+def test_known_encoding():
+    # 300 = 0b10_0101100: low 7 bits first with the continuation bit, then the rest
+    assert encode_block_data([300, 1]).view(np.uint8).tolist() == [0xAC, 0x02, 0x01]
+
+def test_truncated_varint_is_reported():
+    encoded = encode_block_data([5, 300])[:-1]
+    with pytest.raises(ValueError):
+        decode_block_data(encoded, 2)
+
+def test_wrong_voxel_count_is_reported():
+    with pytest.raises(ValueError):
+        decode_block_data(encode_block_data([1, 2, 3]), 4)
+
+def test_compile_palette_shares_ids_across_properties():
+    palette = {
+        "minecraft:air": 0,
+        "minecraft:oak_stairs[facing=north]": 1,
+        "minecraft:oak_stairs[facing=south]": 2,
+        "wotr:processor_block_1_stairs": 3,
+    }
+    tables = compile_palette(palette, {"minecraft:air"}, max_index=4)
+    assert tables.block_ids[1] == tables.block_ids[2]
+    assert tables.names_for(np.array([1, 3, 4])) == ["minecraft:oak_stairs", "wotr:processor_block_1_stairs", "unknown"]
+    assert tables.ignored.tolist() == [True, False, False, False, False]
+    assert tables.placeholder.tolist() == [False, False, False, True, False]
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from amulet_nbt import ByteArrayTag, CompoundTag, ShortTag
+from schematic_readers import read_mcedit, unpack_litematica_states
+
+def pack_longs(values, bits):
+    """Packs values the way Litematica does: little-endian bit order, entries may span two longs."""
+    packed = 0
+    for i, value in enumerate(values):
+        packed |= value << (i * bits)
+    long_count = (len(values) * bits + 63) // 64
+    words = [(packed >> (64 * i)) & ((1 << 64) - 1) for i in range(long_count)]
+    # NBT long arrays are signed
+    return np.array(words, dtype=np.uint64).view(np.int64)
+
+@pytest.mark.parametrize("palette_size", [2, 5, 17, 100, 3000])
+def test_unpack_round_trip(palette_size):
+    bits = max(2, (palette_size - 1).bit_length())
+    values = np.random.default_rng(palette_size).integers(0, palette_size, size=1000)
+    unpacked = unpack_litematica_states(pack_longs(values.tolist(), bits), len(values), palette_size)
+    np.testing.assert_array_equal(unpacked, values)
+
+def test_entries_spanning_two_longs():
+    # With 5 bits, entry 12 starts at bit 60 and takes its top bit from the second long
+    values = [31] * 26
+    longs = pack_longs(values, 5)
+    assert len(longs) == 3
+    unpacked = unpack_litematica_states(longs, len(values), 32)
+    assert unpacked[12] == 31
+    assert unpacked.tolist() == values
+
+def test_highest_bit_of_a_long():
+    # 7-bit entries; entry 9 covers bits 63-69, so the sign bit of the first long belongs to it
+    values = [0] * 9 + [127, 0, 0]
+    longs = pack_longs(values, 7)
+    assert longs[0] < 0
+    assert unpack_litematica_states(longs, len(values), 128).tolist() == values
+
+def mcedit_compound(block_ids, data_values, **extra):
+    return CompoundTag({
+        "Width": ShortTag(len(block_ids)),
+        "Height": ShortTag(1),
+        "Length": ShortTag(1),
+        "Blocks": ByteArrayTag(np.array(block_ids, dtype=np.uint8).view(np.int8)),
+        "Data": ByteArrayTag(np.array(data_values, dtype=np.uint8).view(np.int8)),
+        **extra,
+    })
+
+def block_names(schematic):
+    names = {index: name for name, index in schematic.palette.items()}
+    return [names[index] for index in schematic.block_data.tolist()]
+
+def test_mcedit_data_values_pick_variants():
+    schematic = read_mcedit(mcedit_compound([35, 35, 1, 1, 98, 159, 17, 200], [0, 14, 3, 5, 1, 11, 1 | 4, 0]))
+    assert block_names(schematic) == [
+        "minecraft:white_wool", "minecraft:red_wool", "minecraft:diorite", "minecraft:andesite",
+        "minecraft:mossy_stone_bricks", "minecraft:blue_terracotta", "minecraft:spruce_log", "legacy:200",
+    ]
+
+def test_mcedit_schematica_mapping_uses_legacy_names():
+    mapping = CompoundTag({
+        "minecraft:stonebrick": ShortTag(3),
+        "minecraft:wool": ShortTag(4),
+        "mod:thing": ShortTag(5),
+    })
+    schematic = read_mcedit(mcedit_compound([3, 3, 4, 5], [0, 2, 10, 0], SchematicaMapping=mapping))
+    assert block_names(schematic) == [
+        "minecraft:stone_bricks", "minecraft:cracked_stone_bricks", "minecraft:purple_wool", "mod:thing",
+    ]
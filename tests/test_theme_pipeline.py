@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from schematic_readers import SchematicData
+from theme_pipeline import count_columns, decode_schematic, estimate_columns
+
+blocks = ["minecraft:air", "minecraft:stone", "minecraft:andesite", "minecraft:gravel", "minecraft:moss_block"]
+placeholders = ["wotr:processor_block_1", "wotr:processor_block_1_slab"]
+
+def layered_template(width=64, height=128, seed=0):
+    """Two-column template whose block mix changes with height, like a floor under a wall."""
+    rng = np.random.default_rng(seed)
+    length = len(placeholders)
+    heights = np.linspace(0, 1, height)[:, None, None]
+    # Per voxel: air above, stone and andesite low down, gravel and moss scattered through
+    shares = np.stack([
+        0.2 + 0.5 * heights, 0.5 * (1 - heights), 0.2 * (1 - heights) + 0.05,
+        np.full_like(heights, 0.08), np.full_like(heights, 0.02),
+    ], axis=-1)
+    shares = np.broadcast_to(shares / shares.sum(axis=-1, keepdims=True), (height, length, width, len(blocks)))
+    draws = rng.random((height, length, width, 1))
+    volume = (draws > np.cumsum(shares, axis=-1)).sum(axis=-1)
+    volume[0, :, 0] = len(blocks) + np.arange(length)  # Placeholders at (0,0,z)
+    palette = {name: i for i, name in enumerate(blocks + placeholders)}
+    return decode_schematic(1, SchematicData(width, height, length, palette, volume.reshape(-1).astype(np.int32)))
+
+def true_shares(decoded):
+    return {
+        table.processor_type: dict(zip(table.blocks, table.values / table.values.sum()))
+        for table in count_columns(decoded).columns
+    }
+
+def test_small_templates_are_counted_exactly():
+    decoded = layered_template(width=8, height=8)
+    estimated = estimate_columns(decoded, samples_per_column=256)
+    assert estimated.sampled == 0
+    for exact, table in zip(count_columns(decoded).columns, estimated.columns):
+        assert table.blocks == exact.blocks
+        np.testing.assert_array_equal(table.values, exact.values)
+
+def test_estimates_are_close_to_counts():
+    decoded = layered_template()
+    exact = true_shares(decoded)
+    estimated = estimate_columns(decoded, samples_per_column=512, seed=1)
+    assert estimated.sampled >= 512
+    for table in estimated.columns:
+        shares = table.values / table.values.sum()
+        for block, share in zip(table.blocks, shares):
+            assert share == pytest.approx(exact[table.processor_type][block], abs=0.06)
+
+def test_intervals_cover_the_true_shares():
+    decoded = layered_template()
+    exact = true_shares(decoded)
+    covered = total = 0
+    for seed in range(200):
+        estimated = estimate_columns(decoded, samples_per_column=1024, seed=seed)
+        for table in estimated.intervals:
+            for block, (low, high) in zip(table.blocks, table.values):
+                total += 1
+                covered += low <= exact[table.processor_type][block] <= high
+    # 95% intervals; allow for sampling noise over 1600 intervals and the normal approximation on rare blocks
+    assert 0.92 <= covered / total <= 0.98
+
+@pytest.mark.parametrize("samples_per_column", [0, -5])
+def test_sample_size_must_be_positive(samples_per_column):
+    with pytest.raises(ValueError):
+        estimate_columns(layered_template(), samples_per_column=samples_per_column)
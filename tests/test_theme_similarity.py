@@ -0,0 +1,37 @@
+import pytest
+from theme_outputs import write_column_csv
+from theme_pipeline import ColumnTable
+from theme_similarity import build_similarity_index
+
+themes = {
+    "theme_cave": {"wotr:processor_block_1": {"minecraft:stone": 6, "minecraft:andesite": 4}},
+    "theme_mossy": {"wotr:processor_block_1": {"minecraft:stone": 5, "minecraft:moss_block": 5}},
+    "theme_nether": {"wotr:processor_block_1": {"minecraft:netherrack": 10}},
+}
+
+def write_counts(folder, theme_counts):
+    folder.mkdir(parents=True)
+    columns = [ColumnTable(i, state, counts.keys(), list(counts.values())) for i, (state, counts) in enumerate(theme_counts.items())]
+    write_column_csv(str(folder / "Processor1_blockCounts.csv"), "BlockCounts", columns)
+
+@pytest.fixture
+def index(tmp_path):
+    for theme_name, theme_counts in themes.items():
+        write_counts(tmp_path / theme_name / "BlockCounts", theme_counts)
+    return build_similarity_index(str(tmp_path), str(tmp_path / "index.npz"))
+
+def test_indexed_theme_is_ranked_by_distance(index):
+    assert [name for name, _ in index.nearest_themes("theme_cave", k=2)] == ["theme_mossy", "theme_nether"]
+
+def test_unindexed_counts_can_be_queried(index):
+    # Not in the index, and with a block the index has never seen
+    counts = {"wotr:processor_block_1": {"minecraft:stone": 6, "minecraft:andesite": 3, "minecraft:tuff": 1}}
+    results = index.nearest_themes_to_counts(counts, k=3, metric="tv")
+    assert [name for name, _ in results] == ["theme_cave", "theme_mossy", "theme_nether"]
+    # The unknown block's share counts as disagreement
+    assert results[0][1] == pytest.approx(0.1)
+
+def test_vector_from_counts_keeps_unknown_mass_out(index):
+    vector = index.vector_from_counts({"minecraft:stone": 1, "minecraft:tuff": 1})
+    assert vector.sum() == pytest.approx(0.5)
+    assert vector[index.block_ids["minecraft:stone"]] == pytest.approx(0.5)
@@ -0,0 +1,47 @@
+import io
+import tarfile
+import zipfile
+from theme_sources import archive_themes, find_theme_sources
+
+def add_tar_member(archive, name, content):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    archive.addfile(info, io.BytesIO(content))
+
+def test_tar_of_current_folder_is_named_after_the_archive(tmp_path):
+    # What "tar czf theme_cave.tar.gz -C theme_cave ." produces
+    archive_path = tmp_path / "theme_cave.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        archive.addfile(tarfile.TarInfo("."), None)
+        add_tar_member(archive, "./processor1.schem", b"one")
+        add_tar_member(archive, "./processor2.schem", b"two")
+        add_tar_member(archive, "./notes.txt", b"not a template")
+
+    themes = archive_themes(str(archive_path))
+    assert [theme.name for theme in themes] == ["theme_cave"]
+    assert sorted(themes[0].members) == ["processor1.schem", "processor2.schem"]
+    assert list(themes[0].read_members(["processor2.schem", "processor1.schem"])) == [
+        ("processor2.schem", b"two"), ("processor1.schem", b"one"),
+    ]
+
+def test_tar_folders_are_separate_themes(tmp_path):
+    archive_path = tmp_path / "library.tar"
+    with tarfile.open(archive_path, "w") as archive:
+        add_tar_member(archive, "./theme_a/processor1.schem", b"a")
+        add_tar_member(archive, "theme_b/processor1.schem", b"b")
+        add_tar_member(archive, "./__MACOSX/theme_a/processor1.schem", b"fork")
+
+    themes = find_theme_sources(str(archive_path))
+    assert [theme.name for theme in themes] == ["theme_a", "theme_b"]
+    assert [dict(theme.read_members(["processor1.schem"])) for theme in themes] == [
+        {"processor1.schem": b"a"}, {"processor1.schem": b"b"},
+    ]
+
+def test_zip_at_top_level_is_named_after_the_archive(tmp_path):
+    archive_path = tmp_path / "theme_mal.zip"
+    with zipfile.ZipFile(archive_path, "w") as archive:
+        archive.writestr("processor1.schem", b"one")
+        archive.writestr("._processor1.schem", b"resource fork")
+
+    themes = archive_themes(str(archive_path))
+    assert [(theme.name, sorted(theme.members)) for theme in themes] == [("theme_mal", ["processor1.schem"])]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from weight_check import AliasTable
+
+def test_frequencies_match_weights():
+    weights = {"minecraft:stone": 0.5, "minecraft:andesite": 0.3, "minecraft:gravel": 0.15, "minecraft:moss_block": 0.05}
+    frequencies = AliasTable(weights).frequencies(200000, np.random.default_rng(0))
+    np.testing.assert_allclose(frequencies, list(weights.values()), atol=0.005)
+
+def test_unnormalized_weights():
+    table = AliasTable({"a": 3, "b": 1})
+    np.testing.assert_allclose(table.frequencies(100000, np.random.default_rng(1)), [0.75, 0.25], atol=0.01)
+
+def test_many_uneven_outcomes():
+    rng = np.random.default_rng(2)
+    values = rng.pareto(1.5, size=60) + 1e-3
+    table = AliasTable({f"block_{i}": value for i, value in enumerate(values)})
+    np.testing.assert_allclose(table.frequencies(400000, rng), values / values.sum(), atol=0.005)
+
+def test_zero_weight_is_never_drawn():
+    table = AliasTable({"a": 1.0, "b": 0.0, "c": 2.0})
+    assert not (table.sample(50000, np.random.default_rng(3)) == 1).any()
+
+def test_single_outcome():
+    assert AliasTable({"a": 0.2}).sample(100, np.random.default_rng(4)).tolist() == [0] * 100
+
+@pytest.mark.parametrize("weights", [{}, {"a": 0.0}, {"a": 1.0, "b": -0.5}])
+def test_invalid_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
@@ -0,0 +1,101 @@
+import os
+import argparse
+from theme_pipeline import (
+    build_processor_document,
+    build_replacement,
+    filter_blocks_to_ignore,
+    ignored_blocks,
+    normalize_weights,
+    read_block_counts,
+)
+from theme_cli import add_feature_arguments, base_folder, selected_features
+from theme_outputs import write_document
+
+# Function: blend_theme_counts
+# Purpose: Mixes the per-column block distributions of several themes by weight
+# Input: List of (BlockCounts dictionary, weight) pairs as returned by read_block_counts
+# Output: Dictionary of input_state -> {block: blended share}
+def blend_theme_counts(weighted_counts):
+    """Blends per-column block counts of several themes.
+
+    Each theme's column is turned into a distribution first so a theme with bigger templates
+    does not outweigh the others. When a theme has no column for an input_state, the weights
+    of the themes that do are renormalized for that column. Themes weighted 0 add nothing, so a
+    column only they have is left out of the blend.
+    """
+    blended = {}
+    column_weight = {}
+    for theme_counts, weight in weighted_counts:
+        if weight <= 0:
+            continue
+        for input_state, block_counts in theme_counts.items():
+            block_counts = filter_blocks_to_ignore(block_counts, ignored_blocks)
+            total = sum(block_counts.values())
+            if total == 0:
+                continue
+            shares = blended.setdefault(input_state, {})
+            for block, count in block_counts.items():
+                shares[block] = shares.get(block, 0.0) + weight * count / total
+            column_weight[input_state] = column_weight.get(input_state, 0.0) + weight
+
+    return {
+        input_state: {block: share / column_weight[input_state] for block, share in shares.items()}
+        for input_state, shares in blended.items()
+    }
+
+# Function: blend_themes
+# Purpose: Builds processor replacements for a weighted mix of themes from their cached counts
+# Input: List of (theme folder, weight) pairs
+# Output: List of processor replacements, in the same order process_schematics produces them
+def blend_themes(theme_weights):
+    if not theme_weights:
+        raise ValueError("At least one theme is needed to blend")
+    if any(weight < 0 for _, weight in theme_weights) or sum(weight for _, weight in theme_weights) <= 0:
+        raise ValueError("Blend weights must be non-negative and not all zero")
+
+    weighted_counts = []
+    for theme_folder, weight in theme_weights:
+        csv_counts_folder = os.path.join(theme_folder, "BlockCounts")
+        if not os.path.isdir(csv_counts_folder):
+            raise FileNotFoundError(f"No BlockCounts folder in {theme_folder}, run the generator for this theme first")
+        weighted_counts.append((read_block_counts(csv_counts_folder), weight))
+
+    return [
+        build_replacement(input_state, normalize_weights(shares))
+        for input_state, shares in blend_theme_counts(weighted_counts).items()
+    ]
+
+def parse_theme_weight(text):
+    theme_name, _, weight = text.rpartition(":")
+    if not theme_name:
+        raise argparse.ArgumentTypeError(f"Expected THEME:WEIGHT, got '{text}'")
+    try:
+        return theme_name, float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Weight in '{text}' is not a number")
+
+def main():
+    parser = argparse.ArgumentParser(description="Blend cached theme block counts into a new processor list.")
+    parser.add_argument("themes", nargs="+", type=parse_theme_weight, help="Theme folder and weight, e.g. theme_mal:0.7")
+    parser.add_argument("--name", required=True, help="Name of the blended theme, used in the output file name")
+    parser.add_argument("--target", choices=("room", "poi"), default="room")
+    parser.add_argument("--root", default=base_folder, help="Folder containing the theme folders")
+    add_feature_arguments(parser)
+    parser.add_argument("-o", "--output", help="Output path, defaults to {target}_{name}.json")
+    args = parser.parse_args()
+
+    processor_replacements = blend_themes([(os.path.join(args.root, theme), weight) for theme, weight in args.themes])
+
+    json_file_path = args.output or f"{args.target}_{args.name}.json"
+    document = build_processor_document(processor_replacements, selected_features(args, args.target))
+    written, changes = write_document(json_file_path, document)
+
+    if written:
+        print(f"✅ Blended {len(args.themes)} themes into {json_file_path} ({len(processor_replacements)} replacements)")
+    else:
+        print(f"➖ {json_file_path} is already up to date")
+    for input_state, change in changes["changed_states"].items():
+        print(f"   {input_state}: {len(change['gained'])} gained, {len(change['lost'])} lost, {len(change['changed'])} changed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import os
+import json
+import hashlib
+import argparse
+from schematic_readers import schematic_extensions
+from theme_cli import base_folder, target_options
+from theme_pipeline import required_processors, optional_processors
+
+# Default manifest location, next to the themes (next to the executable in a PyInstaller build)
+default_manifest_path = os.path.join(base_folder, "theme_catalog.json")
+
+manifest_version = 2
+
+# Folders under the theme root that are never themes
+excluded_folders = {"dist", "build", "Archive", "__pycache__"}
+
+# Processor template file names a theme folder may hold, in any readable format
+processor_files = {
+    f"processor{i}{extension}"
+    for i in [*required_processors, *optional_processors]
+    for extension in schematic_extensions()
+}
+
+# Function: file_sha256
+# Purpose: Hashes a file's content in chunks
+# Input: Path to the file
+# Output: Hex SHA-256 digest
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Class: ThemeCatalog
+# Purpose: Manifest of every theme folder's processor templates, refreshed incrementally
+class ThemeCatalog:
+    def __init__(self, themes_root=base_folder, manifest_path=default_manifest_path):
+        self.themes_root = themes_root
+        self.manifest_path = manifest_path
+        self.themes = {}
+        self.other_folders = {}  # Folder name -> mtime of folders holding no templates, so they are not relisted
+        self.load()
+
+    def load(self):
+        """Reads the manifest; a missing, unreadable or foreign manifest starts an empty catalog."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        if manifest.get("version") == manifest_version and manifest.get("root") == os.path.abspath(self.themes_root):
+            self.themes = manifest.get("themes", {})
+            self.other_folders = manifest.get("other_folders", {})
+
+    def save(self):
+        manifest = {
+            "version": manifest_version,
+            "root": os.path.abspath(self.themes_root),
+            "themes": self.themes,
+            "other_folders": self.other_folders,
+        }
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def refresh(self):
+        """Rescans the theme root, only relisting folders and rehashing files that changed.
+
+        A folder whose mtime is unchanged keeps its recorded file list, or stays a non-theme
+        folder without being listed again. Files are rehashed only when their size or mtime
+        differs from the manifest. Returns the names of folders whose record changed.
+        """
+        changed = set()
+        seen = set()
+        for entry in os.scandir(self.themes_root):
+            if not entry.is_dir() or entry.name in excluded_folders or entry.name.startswith("."):
+                continue
+            seen.add(entry.name)
+            if self._refresh_theme(entry.name, entry.path, entry.stat().st_mtime_ns):
+                changed.add(entry.name)
+
+        for removed in set(self.themes) - seen:
+            del self.themes[removed]
+            changed.add(removed)
+        for removed in set(self.other_folders) - seen:
+            del self.other_folders[removed]
+            changed.add(removed)
+        return changed
+
+    def _refresh_theme(self, theme_name, theme_folder, folder_mtime_ns):
+        record = self.themes.get(theme_name)
+        if record is not None and record["folder_mtime_ns"] == folder_mtime_ns:
+            names = set(record["files"])
+        elif self.other_folders.get(theme_name) == folder_mtime_ns:
+            return False
+        else:
+            names = {name for name in os.listdir(theme_folder) if name in processor_files}
+
+        if not names:
+            # Not a theme (output folders, tool folders, ...); only its mtime is kept
+            changed = self.themes.pop(theme_name, None) is not None or self.other_folders.get(theme_name) != folder_mtime_ns
+            self.other_folders[theme_name] = folder_mtime_ns
+            return changed
+        self.other_folders.pop(theme_name, None)
+
+        old_files = record["files"] if record else {}
+        files = {}
+        changed = record is None or record["folder_mtime_ns"] != folder_mtime_ns
+        for name in sorted(names):
+            path = os.path.join(theme_folder, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                changed = True
+                continue
+            old = old_files.get(name)
+            if old and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+                files[name] = old
+                continue
+            files[name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": file_sha256(path)}
+            changed = changed or old is None or old["sha256"] != files[name]["sha256"]
+
+        self.themes[theme_name] = {
+            "folder_mtime_ns": folder_mtime_ns,
+            "complete": all(any(os.path.splitext(name)[0] == f"processor{i}" for name in files) for i in required_processors),
+            "files": files,
+            "built": record.get("built", {}) if record else {},
+        }
+        return changed
+
+    def theme_names(self, complete_only=False):
+        return sorted(name for name, record in self.themes.items() if record["complete"] or not complete_only)
+
+    def needs_rebuild(self, theme_name, target):
+        """True when the theme's templates differ from the ones recorded by the last mark_built for the target."""
+        record = self.themes[theme_name]
+        return record["built"].get(target) != {name: info["sha256"] for name, info in record["files"].items()}
+
+    def stale_themes(self, targets=tuple(target_options)):
+        return [name for name in self.theme_names() if any(self.needs_rebuild(name, target) for target in targets)]
+
+    def mark_built(self, theme_name, target):
+        """Records the theme's current templates as built into the target's processor list."""
+        record = self.themes[theme_name]
+        record["built"][target] = {name: info["sha256"] for name, info in record["files"].items()}
+
+# Function: open_catalog
+# Purpose: Loads the manifest, refreshes it against the theme root and saves it if anything changed
+# Input: Theme root folder and manifest path
+# Output: ThemeCatalog
+def open_catalog(themes_root=base_folder, manifest_path=default_manifest_path):
+    catalog = ThemeCatalog(themes_root, manifest_path)
+    if catalog.refresh() or not os.path.exists(manifest_path):
+        catalog.save()
+    return catalog
+
+def main():
+    parser = argparse.ArgumentParser(description="List the theme catalog and which themes need rebuilding.")
+    parser.add_argument("--root", default=base_folder, help="Folder containing the theme folders")
+    parser.add_argument("--manifest", default=default_manifest_path)
+    parser.add_argument("--stale", action="store_true", help="Only list themes that need rebuilding")
+    parser.add_argument("--target", nargs="+", choices=tuple(target_options), default=list(target_options), help="Targets to check")
+    args = parser.parse_args()
+
+    catalog = open_catalog(args.root, args.manifest)
+    names = catalog.stale_themes(args.target) if args.stale else catalog.theme_names()
+    for name in names:
+        record = catalog.themes[name]
+        status = ", ".join(f"{target} {'rebuild' if catalog.needs_rebuild(name, target) else 'up to date'}" for target in args.target)
+        completeness = "" if record["complete"] else ", missing required processors"
+        print(f"{name}: {len(record['files'])} processors, {status}{completeness}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import argparse
+
+if getattr(sys, 'frozen', False):
+    # Running as a PyInstaller bundle: themes and outputs live next to the executable
+    base_folder = os.path.dirname(sys.executable)
+else:
+    # Running as a normal script
+    base_folder = os.path.dirname(os.path.abspath(__file__))
+
+# Rarity features each target offers, as in show_checklist_popup
+target_options = {
+    "room": ("mushroom", "vines"),
+    "poi": ("chest",),
+}
+
+# Function: sample_count
+# Purpose: argparse type for --samples-per-column: a whole number of at least 1
+# Input: Command-line text
+# Output: int
+def sample_count(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a whole number")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"at least 1 sample per column is needed, got {value}")
+    return value
+
+# Function: add_feature_arguments
+# Purpose: Adds the noise scale and rarity options of a processors document to a command-line parser
+# Input: argparse.ArgumentParser
+# Output: None
+def add_feature_arguments(parser):
+    parser.add_argument("--noise-scale", type=float, nargs=3, default=(0.075, 0.075, 0.075), metavar=("X", "Y", "Z"))
+    parser.add_argument("--mushroom", type=float, help="Rarity of wotr:mushrooms (room lists only)")
+    parser.add_argument("--vines", type=float, help="Rarity of wotr:vines (room lists only)")
+    parser.add_argument("--chest", type=float, help="Rarity of wotr:rift_chests (poi lists only)")
+
+# Function: selected_features
+# Purpose: Turns the options added by add_feature_arguments into build_processor_document features for one target
+# Input: Parsed arguments and the target ("room" or "poi")
+# Output: Dictionary of selected features
+def selected_features(args, target):
+    features = {
+        "noise_scale_x": args.noise_scale[0],
+        "noise_scale_y": args.noise_scale[1],
+        "noise_scale_z": args.noise_scale[2],
+    }
+    for feature in target_options[target]:
+        if getattr(args, feature) is not None:
+            features[feature] = getattr(args, feature)
+    return features
@@ -0,0 +1,111 @@
+import os
+import json
+import zipfile
+import argparse
+from theme_outputs import AtomicStream, read_document, render_json
+from theme_cli import add_feature_arguments, sample_count, selected_features
+from theme_pipeline import build_processor_document, theme_replacements
+from theme_sources import find_theme_sources
+
+# Data pack format of Minecraft 1.21.4, the first release with the pale oak blocks the themes use
+default_pack_format = 61
+
+# Every entry gets the same timestamp (the earliest a zip can hold) so rebuilt packs are byte-identical
+entry_date_time = (1980, 1, 1, 0, 0, 0)
+
+# Function: processor_list_path
+# Purpose: Gives the path of a processor list inside a data pack
+# Input: Namespace and processor list name, e.g. wotr and room_theme_mal
+# Output: Archive path, e.g. data/wotr/worldgen/processor_list/room_theme_mal.json
+def processor_list_path(namespace, name):
+    return f"data/{namespace}/worldgen/processor_list/{name}.json"
+
+def _entry_info(path):
+    info = zipfile.ZipInfo(path, date_time=entry_date_time)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 3  # Unix, whatever platform builds the pack
+    info.external_attr = 0o644 << 16
+    return info
+
+# Function: write_datapack
+# Purpose: Streams processor lists into a data pack zip, one entry at a time
+# Input: Pack path, dictionary of processor list name -> document or callable building it, namespace, pack format and description
+# Output: True if the pack was written, False if an identical pack was already there
+def write_datapack(pack_path, processor_lists, namespace="wotr", pack_format=default_pack_format, description="Processor lists"):
+    """Writes a data pack with pack.mcmeta and one processor_list entry per document.
+
+    Entries are written in name order with fixed timestamps and attributes, so building the
+    same documents again gives the same bytes and leaves an existing pack untouched. A callable
+    document is only built when its entry is written, so just one document is in memory at a time.
+    """
+    pack_meta = {"pack": {"pack_format": pack_format, "description": description}}
+    output = AtomicStream(pack_path)
+    with output as f, zipfile.ZipFile(f, "w") as archive:
+        with archive.open(_entry_info("pack.mcmeta"), "w") as entry:
+            entry.write(json.dumps(pack_meta, indent=4).encode("utf-8"))
+        for name in sorted(processor_lists):
+            document = processor_lists[name]
+            if callable(document):
+                document = document()
+            with archive.open(_entry_info(processor_list_path(namespace, name)), "w") as entry:
+                entry.write(render_json(document).encode("utf-8"))
+    return output.written
+
+# Class: SharedReplacements
+# Purpose: Runs the pipeline of one theme once for all the targets packed from it
+class SharedReplacements:
+    __slots__ = ("source", "uses", "samples_per_column", "replacements")
+
+    def __init__(self, source, uses, samples_per_column=None):
+        self.source = source
+        self.uses = uses                # Entries still to be built from this theme
+        self.samples_per_column = samples_per_column
+        self.replacements = None
+
+    def take(self):
+        """Gives the theme's replacements, building them on first use and dropping them after the last."""
+        replacements = self.replacements
+        if replacements is None:
+            replacements = list(theme_replacements(self.source, self.samples_per_column))
+        self.uses -= 1
+        self.replacements = replacements if self.uses else None
+        return replacements
+
+def main():
+    parser = argparse.ArgumentParser(description="Build processor lists for many themes straight into a data pack zip.")
+    parser.add_argument("themes", nargs="*", help="Theme folders, theme archives or folders of them")
+    parser.add_argument("-o", "--output", required=True, help="Path of the data pack zip")
+    parser.add_argument("--target", nargs="+", choices=("room", "poi"), default=["room"], help="Targets to build for every theme")
+    parser.add_argument("--include", nargs="+", default=[], help="Already generated processor list JSON files to add as they are; they replace built lists of the same name")
+    parser.add_argument("--namespace", default="wotr")
+    parser.add_argument("--pack-format", type=int, default=default_pack_format)
+    parser.add_argument("--description", default="Processor lists")
+    parser.add_argument("--samples-per-column", type=sample_count, metavar="N", help="Estimate column counts from N sampled voxels per column instead of counting every voxel")
+    add_feature_arguments(parser)
+    args = parser.parse_args()
+
+    targets = list(dict.fromkeys(args.target))
+    target_features = {target: selected_features(args, target) for target in targets}
+
+    processor_lists = {}
+    for path in args.themes:
+        for source in find_theme_sources(path):
+            shared = SharedReplacements(source, len(targets), args.samples_per_column)
+            for target in targets:
+                # Bound as defaults so each entry builds its own theme and target when it is written
+                processor_lists[f"{target}_{source.name}"] = (
+                    lambda shared=shared, target=target: build_processor_document(shared.take(), target_features[target])
+                )
+    for path in args.include:
+        document = read_document(path)
+        if document is None:
+            raise SystemExit(f"{path} is not a readable processor list")
+        processor_lists[os.path.splitext(os.path.basename(path))[0]] = document
+
+    if not processor_lists:
+        raise SystemExit("No themes or processor lists found to pack")
+    written = write_datapack(args.output, processor_lists, args.namespace, args.pack_format, args.description)
+    print(f"{'✅ Wrote' if written else '➖ Unchanged'}: {args.output} ({len(processor_lists)} processor lists)")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,33 @@
 import os
-import csv
-import json
-from amulet_nbt import load, CompoundTag
-from collections import defaultdict
+import argparse
 import tkinter as tk
 from tkinter import simpledialog, filedialog
 import sys
-
-if getattr(sys, 'frozen', False):
-    # Running as a PyInstaller bundle
-    base_folder = os.path.dirname(sys.executable)
-else:
-    # Running as a normal script
-    base_folder = os.path.dirname(os.path.abspath(__file__))
+import logging
+from theme_catalog import open_catalog
+from theme_cli import base_folder, sample_count, target_options
+from theme_metrics import configure_logging, log_event, metrics
+from theme_outputs import render_csv, write_column_csv, write_document, write_if_changed
+from theme_store import BlockCountStore, default_store_path
+from theme_pipeline import (
+    build_processor_document,
+    build_replacements,
+    count_columns,
+    decode_schematics,
+    estimate_columns,
+    load_schematics,
+    weigh_columns,
+)
+
+# Structured event log and metrics snapshot written next to the script
+event_log_path = os.path.join(base_folder, "theme_json_generator.log.jsonl")
+metrics_snapshot_path = os.path.join(base_folder, "theme_json_generator_metrics.json")
 
 # Function: select_theme_and_target
 # Purpose: Creates a GUI popup to select a theme folder and a target (Room or POI)
-# Input: None
+# Input: Theme folder names to offer
 # Output: Selected theme and target as strings
-def select_theme_and_target():
+def select_theme_and_target(theme_folders):
     """Creates a popup to select the theme folder and target (Room or POI)."""
     root = tk.Tk()
     root.withdraw()  # Hide the root window
@@ -31,7 +40,6 @@ def select_theme_and_target():
     tk.Label(selection_window, text="Select Theme", font=("Arial", 12, "bold")).grid(row=0, column=0, pady=10, padx=10)
 
     theme_var = tk.StringVar()
-    theme_folders = [f for f in os.listdir(base_folder) if os.path.isdir(os.path.join(base_folder, f))]
     theme_dropdown = tk.OptionMenu(selection_window, theme_var, *theme_folders)
     theme_dropdown.grid(row=0, column=1, pady=10, padx=10)
 
@@ -97,7 +105,7 @@ def show_checklist_popup(target):
     row_offset += len(mandatory_items)  # Correctly position after mandatory items
 
     # Define options based on target
-    options = ["mushroom", "vines"] if target == "room" else ["chest"]
+    options = list(target_options[target])
 
     # Default processor values
     default_values = {
@@ -254,227 +262,92 @@ def show_checklist_popup(target):
     checklist_window.selected_options = None
     checklist_window.wait_window()
     return checklist_window.selected_options
-# Function: normalize_weights
-# Purpose: Normalizes block counts into weights that sum to 1.0
-# Input: Dictionary of block counts
-# Output: Dictionary of normalized weights
-def normalize_weights(counts: dict[str, int]) -> dict[str, float]:
-    total = sum(counts.values())
-    if total == 0:
-        return {}
-
-    weights = {k: v / total for k, v in counts.items()}
-    rounded = {k: round(v, 3) for k, v in weights.items()}
-
-    # Ensure total sums to 1.0 (adjust for rounding error)
-    diff = round(1.0 - sum(rounded.values()), 3)
-    if diff != 0:
-        # Pick block with highest count; break ties by key order
-        max_blocks = [k for k, v in counts.items() if v == max(counts.values())]
-        target_block = sorted(max_blocks)[0]
-        rounded[target_block] = round(rounded[target_block] + diff, 3)
-
-    return rounded
-
-# Blocks to ignore during processing
-ignored_blocks = {
-    "minecraft:air",
-    "minecraft:void_air",
-    "minecraft:cave_air",
-    "minecraft:bedrock",
-}
-
-# Function: filter_blocks_to_ignore
-# Purpose: Filters out blocks that should be ignored during processing
-# Input: List of blocks to ignore and the block data
-# Output: Filtered block data
-def filter_blocks_to_ignore(block_data, blocks_to_ignore):
-    """Filters out blocks that are in the ignore list."""
-    return {block: count for block, count in block_data.items() if block not in blocks_to_ignore}
+# Function: write_block_csv
+# Purpose: Writes the non-ignored blocks of a decoded template to a CSV file
+# Input: DecodedSchematic and the Blockcsv output folder
+# Output: Tuple of (path of the CSV, whether it was rewritten)
+def write_block_csv(decoded, csv_output_folder):
+    output_path = os.path.join(csv_output_folder, f"processor{decoded.processor_num}.csv")
+    x, y, z = decoded.coordinates()
+    rows = zip(x.tolist(), y.tolist(), z.tolist(), decoded.palette_tables.names_for(decoded.block_data[decoded.kept]))
+    return output_path, write_if_changed(output_path, render_csv(["Depth", "Height", "Column", "Block"], rows))
 
 # Function: process_schematics
 # Purpose: Processes .schem files to generate CSV files for block data, counts, and weights
-# Input: Paths to theme folder, output folders for CSVs, and weights
+# Input: Paths to theme folder, output folders for CSVs, and weights, an optional BlockCountStore and sample size
 # Output: List of processor replacements for JSON generation
-def process_schematics(theme_folder, csv_output_folder, csv_counts_folder, csv_weights_folder):
-    """Processes .schem files and generates JSON for processors."""
-    expected_schems = {f"processor{i}.schem" for i in range(1, 9)}
-    column_suffixes = [
-        "",  # 0 = base block
-        "_directional_pillar",
-        "_slab",
-        "_stairs",
-        "_wall",
-        "_button",
-        "_pressure_plate",
-        "_fence",
-        "_fence_gate",
-        "_glass",
-        "_glass_pane",
-        "_trapdoor"
-    ]
-
-    # Extend the expected_schems to include optional processors 9 to 15
-    optional_schems = {f"processor{i}.schem" for i in range(9, 16)}
-    all_schems = sorted(expected_schems | optional_schems)
+def process_schematics(theme_folder, csv_output_folder, csv_counts_folder, csv_weights_folder, count_store=None, samples_per_column=None):
+    """Runs the theme_pipeline stages and keeps a CSV copy of each stage's output.
 
+    With samples_per_column the column counts are estimated from a stratified sample (see
+    theme_pipeline.estimate_columns), and the confidence interval of every block's share is
+    written next to the weights as Processor<N>_blockWeightIntervals.csv.
+    """
     os.makedirs(csv_output_folder, exist_ok=True)
     os.makedirs(csv_counts_folder, exist_ok=True)
     os.makedirs(csv_weights_folder, exist_ok=True)
 
     replacements = []
 
-    # Update the loop to process both required and optional schematics
-    for schem_file in all_schems:  # Keep output order consistent
-        input_path = os.path.join(theme_folder, schem_file)
-        output_path = os.path.join(csv_output_folder, os.path.splitext(schem_file)[0] + ".csv")
+    for decoded in decode_schematics(load_schematics(theme_folder)):
+        output_path, written = write_block_csv(decoded, csv_output_folder)
+        log_event("schematic_exported", f"{'✅ Exported' if written else '➖ Unchanged'}: {os.path.relpath(output_path, base_folder)}",
+                  processor=decoded.processor_num, output=output_path, voxels=len(decoded.block_data), written=written)
 
-        if not os.path.exists(input_path):
-            if schem_file in expected_schems:
-                print(f"❌ Missing required file: {schem_file}")
+        if samples_per_column:
+            counted = estimate_columns(decoded, samples_per_column)
+        else:
+            counted = count_columns(decoded)
+        if counted is None:
             continue
-
-        # Load the schematic's NBT data
-        nbt = load(input_path)
-        compound: CompoundTag = nbt.compound
-
-        width = compound["Width"].py_data
-        height = compound["Height"].py_data
-        length = compound["Length"].py_data
-
-        palette = compound["Palette"]
-        block_data = compound["BlockData"].py_data
-
-        # Map palette index to block name (ignore properties like [facing=north])
-        palette_lookup = {v.py_data: k.split("[")[0] for k, v in palette.items()}
-
-        # Write block data to a CSV file
-        with open(output_path, "w", newline="") as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(["Depth", "Height", "Column", "Block"])
-
-            index = 0
-            for y in range(height):
-                for z in range(length):
-                    for x in range(width):
-                        block_index = block_data[index]
-                        block_name = palette_lookup.get(block_index, "unknown")
-
-                        if block_name not in ignored_blocks:
-                            writer.writerow([x, y, z, block_name])
-
-                        index += 1
-        print(f"✅ Exported: {os.path.relpath(output_path, base_folder)}")
-
-    for file in os.listdir(csv_output_folder):
-        if not file.lower().endswith(".csv"):
-            continue
-
-        filename_base = os.path.splitext(file)[0].lower()
-        if not filename_base.startswith("processor"):
-            continue
-
-        try:
-            processor_num = int(filename_base.replace("processor", ""))
-        except ValueError:
-            continue
-
-        processor_base = f"wotr:processor_block_{processor_num}"
-
-        input_csv = os.path.join(csv_output_folder, file)
-        counts_csv = os.path.join(csv_counts_folder, f"Processor{processor_num}_blockCounts.csv")
-        weights_csv = os.path.join(csv_weights_folder, f"Processor{processor_num}_blockWeights.csv")
-
-        column_block_counts = defaultdict(lambda: defaultdict(int))
-        column_first_blocks = {}
-
-        with open(input_csv, newline="") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                x = int(row["Depth"])
-                y = int(row["Height"])
-                z = int(row["Column"])
-                block = row["Block"]
-
-                if x == 0 and y == 0 and z not in column_first_blocks:
-                    column_first_blocks[z] = block
-
-                column_block_counts[z][block] += 1
-
-        # Verify the first block in each column matches the expected processor block
-        valid = True
-        for column, expected_suffix in enumerate(column_suffixes):
-            expected_block = processor_base + expected_suffix
-            actual_block = column_first_blocks.get(column)
-
-            if actual_block != expected_block:
-                print(f"❌ Column {column} in {file} expected '{expected_block}' at (0,0,{column}) but found '{actual_block}'")
-                valid = False
-
-        if not valid:
-            print(f"⚠️ Skipping file due to incorrect placeholder blocks: {file}")
-            continue
-
-        with open(counts_csv, "w", newline="") as f:
-            writer = csv.writer(f)  # Corrected file object reference
-            writer.writerow(["Column", "ProcessorType", "BlockCounts"])
-            for column in sorted(column_block_counts):
-                suffix = column_suffixes[column] if column < len(column_suffixes) else ""
-                processor_type = processor_base + suffix
-                block_counts = column_block_counts[column]
-                block_counts.pop(processor_type, None)  # Remove the processor block from the block counts
-                writer.writerow([column, processor_type, json.dumps(block_counts)])
-
-        with open(weights_csv, "w", newline="") as f:
-            writer = csv.writer(f)  # Corrected file object reference
-            writer.writerow(["Column", "ProcessorType", "BlockWeights"])
-            for column in sorted(column_block_counts):
-                suffix = column_suffixes[column] if column < len(column_suffixes) else ""
-                processor_type = processor_base + suffix
-                block_counts = filter_blocks_to_ignore(dict(column_block_counts[column]), ignored_blocks)
-                weights = normalize_weights(block_counts)
-                writer.writerow([column, processor_type, json.dumps(weights)])
-
-        print(f"✅ Exported: {counts_csv}")
-        print(f"✅ Exported: {weights_csv}")
-
-    for file in sorted(os.listdir(csv_weights_folder)):
-        if not file.endswith("_blockWeights.csv"):
-            continue
-
-        file_path = os.path.join(csv_weights_folder, file)
-        with open(file_path, newline="") as f:
-            reader = csv.DictReader(f)
-
-            for row in reader:
-                input_state = row["ProcessorType"]
-                try:
-                    block_weights = json.loads(row["BlockWeights"])
-                except json.JSONDecodeError:
-                    continue
-
-                output_steps = [
-                    {
-                        "output_state": block,
-                        "step_size": weight
-                    } for block, weight in block_weights.items()
-                ]
-
-                replacements.append({
-                    "input_state": input_state,
-                    "output_steps": output_steps
-                })
+        weighted = weigh_columns(counted)
+
+        counts_csv = os.path.join(csv_counts_folder, f"Processor{decoded.processor_num}_blockCounts.csv")
+        weights_csv = os.path.join(csv_weights_folder, f"Processor{decoded.processor_num}_blockWeights.csv")
+        column_csvs = [
+            (counts_csv, "BlockCounts", counted.columns, "counts_exported"),
+            (weights_csv, "BlockWeights", weighted.columns, "weights_exported"),
+        ]
+        if samples_per_column:
+            intervals_csv = os.path.join(csv_weights_folder, f"Processor{decoded.processor_num}_blockWeightIntervals.csv")
+            column_csvs.append((intervals_csv, "WeightIntervals", counted.intervals, "intervals_exported"))
+            log_event("columns_estimated", f"processor{decoded.processor_num}: "
+                      + (f"{counted.sampled} samples per column" if counted.sampled else "small enough to count exactly"),
+                      processor=decoded.processor_num, sampled=counted.sampled)
+        for output_path, value_column, columns, event in column_csvs:
+            written = write_column_csv(output_path, value_column, columns)
+            log_event(event, f"{'✅ Exported' if written else '➖ Unchanged'}: {output_path}",
+                      processor=decoded.processor_num, output=output_path, written=written)
+
+        if count_store is not None:
+            with metrics.timer("store"):
+                count_store.replace_processor(os.path.basename(os.path.normpath(theme_folder)), decoded.processor_num, counted.columns)
+
+        replacements.extend(build_replacements([weighted]))
 
     return replacements
 
 # Function: process_csv_to_json
 # Purpose: Main function to process CSV data into JSON format
-# Input: Path to CSV file and output JSON file
+# Input: Path to CSV file, output JSON file and an optional sample size per column for approximate counting
 # Output: JSON file containing processed data
-def process_csv_to_json(csv_file_path, json_file_path):
-    theme_name, target = select_theme_and_target()
+def process_csv_to_json(csv_file_path, json_file_path, samples_per_column=None):
+    configure_logging(event_log_path)
+    try:
+        _process_csv_to_json(csv_file_path, json_file_path, samples_per_column)
+    finally:
+        # Always leave a metrics snapshot behind, including for failed or cancelled runs
+        metrics.write_snapshot(metrics_snapshot_path)
+
+def _process_csv_to_json(csv_file_path, json_file_path, samples_per_column=None):
+    # Only folders holding processor templates are offered; the catalog avoids rescanning unchanged ones
+    catalog = open_catalog(base_folder)
+    if not catalog.theme_names():
+        log_event("no_themes", f"❌ No theme folders with processor templates in {base_folder}. Exiting.", logging.ERROR, root=base_folder)
+        sys.exit(1)
+    theme_name, target = select_theme_and_target(catalog.theme_names())
     if not theme_name or not target:
-        print("No theme or target selected. Exiting.")
+        log_event("run_cancelled", "No theme or target selected. Exiting.", logging.WARNING)
         sys.exit()
 
     theme_folder = os.path.join(base_folder, theme_name)
@@ -482,82 +355,60 @@ def process_csv_to_json(csv_file_path, json_file_path):
     csv_counts_folder = os.path.join(theme_folder, "BlockCounts")
     csv_weights_folder = os.path.join(theme_folder, "BlockWeights")
 
-    processor_replacements = process_schematics(theme_folder, csv_output_folder, csv_counts_folder, csv_weights_folder)
+    log_event("run_started", f"Processing theme '{theme_name}' for target '{target}'", theme=theme_name, target=target)
+    # Counts are also recorded in the SQLite store once it has been created with theme_store.py
+    count_store = BlockCountStore(default_store_path) if os.path.exists(default_store_path) else None
+    try:
+        processor_replacements = process_schematics(theme_folder, csv_output_folder, csv_counts_folder, csv_weights_folder, count_store, samples_per_column)
+    finally:
+        if count_store is not None:
+            count_store.close()
+    metrics.incr("replacements_generated", len(processor_replacements))
     
     
 
     # Additional logic from theme_json_generator
     selected_features = show_checklist_popup(target)
     if selected_features is None:
-        print("No selections made, exiting.")
+        log_event("run_cancelled", "No selections made, exiting.", logging.WARNING)
         sys.exit()
 
     try:
-        endnote = []
-        for feature, rarity in selected_features.items():
-            if rarity is not None:
-                if feature == "mushroom":
-                    endnote.append({"processor_type": "wotr:mushrooms", "rarity": rarity})
-                elif feature == "vines":
-                    endnote.append({"processor_type": "wotr:vines", "rarity": rarity})
-                elif feature == "chest":
-                    endnote.append({
-                        "processor_type": "wotr:rift_chests",
-                        "base_loot_table": "wotr:chests/",
-                        "rarity": rarity,
-                        "chest_types": [{"chest_type": "wooden", "weight": 1}]
-                    })
-
-        if "attachments" in selected_features:
-            for attachment in selected_features["attachments"]:
-                if attachment["name"]:
-                    attachment_data = {
-                        "processor_type": "wotr:attachment",
-                        "requires_sides": int(attachment["sides"] if attachment["sides"].strip() else 0),
-                        "requires_up": bool(attachment["up"]),
-                        "requires_down": bool(attachment["down"]),
-                        "rarity": float(attachment["rarity"] if attachment["rarity"].strip() else 0),
-                        "blockstate": {
-                            "Name": attachment["name"],
-                            "Properties": {
-                                attachment["property_1"]: attachment["value_1"]
-                                for property, value in [
-                                    (attachment["property_1"], attachment["value_1"]),
-                                    (attachment["property_2"], attachment["value_2"])
-                                ]
-                                if property and value
-                            }
-                        }
-                    }
-                    endnote.append(attachment_data)
-
-        final_output = {
-            "processors": [
-                {
-                    "processor_type": "wotr:spot_gradient",
-                    "noise_scale_x": selected_features.get("noise_scale_x", 0.075),
-                    "noise_scale_y": selected_features.get("noise_scale_y", 0.075),
-                    "noise_scale_z": selected_features.get("noise_scale_z", 0.075),
-                    "replacements": processor_replacements,
-                    
-                },
-                *endnote
-            ]
-        }
-
-        # Generate JSON file name based on target and theme name
-        json_file_path = f"{target}_{theme_name}.json"
-
-        with open(json_file_path, 'w', encoding='utf-8') as jsonfile:
-            json.dump(final_output, jsonfile, indent=4)
-
-        print(f"JSON data processed and saved to {json_file_path}")
+        final_output = build_processor_document(processor_replacements, selected_features)
+
+        # Generate JSON file name based on target and theme name unless a path was given
+        json_file_path = json_file_path or f"{target}_{theme_name}.json"
+
+        with metrics.timer("write_json"):
+            written, changes = write_document(json_file_path, final_output)
+
+        if written:
+            metrics.incr("documents_written")
+        catalog.mark_built(theme_name, target)
+        catalog.save()
+        log_event("json_written" if written else "json_unchanged",
+                  f"JSON data processed and saved to {json_file_path}" if written else f"JSON data unchanged in {json_file_path}",
+                  theme=theme_name, target=target, output=json_file_path, replacements=len(processor_replacements), written=written)
+        log_event("json_changes",
+                  f"Replacements: {len(changes['added_states'])} added, {len(changes['removed_states'])} removed, "
+                  f"{len(changes['changed_states'])} changed",
+                  theme=theme_name, target=target, output=json_file_path, **changes)
     except Exception as e:
-        print(f"Error saving JSON file: {e}")
+        # Record the failure with its traceback and let it propagate instead of hiding it
+        metrics.incr("run_failures")
+        log_event("json_failed", f"Error saving JSON file: {e}", logging.ERROR, exc_info=True,
+                  theme=theme_name, target=target)
+        raise
 
 # Example usage section
 # Demonstrates how to call the main function with example file paths
 # Example usage
-csv_file = 'processor_theme_sheet.csv'
-json_file = ''
-process_csv_to_json(csv_file, json_file)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick a theme and target, then generate its processor list.")
+    parser.add_argument("--samples-per-column", type=sample_count, metavar="N",
+                        help="Estimate column counts from N sampled voxels per column instead of counting every voxel (for very large templates)")
+    args = parser.parse_args()
+
+    csv_file = 'processor_theme_sheet.csv'
+    json_file = ''
+    process_csv_to_json(csv_file, json_file, args.samples_per_column)
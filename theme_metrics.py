@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Shared logger for the generator and its helper modules
+logger = logging.getLogger("theme_json_generator")
+
+# Upper bounds (seconds) for the duration histogram buckets
+duration_buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0)
+
+# Class: JsonLinesFormatter
+# Purpose: Formats log records as one JSON object per line for the structured event log
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "event": getattr(record, "event", record.name),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+# Function: configure_logging
+# Purpose: Sends log records to the console and to a JSON lines event log
+# Input: Path to the event log file
+# Output: None
+def configure_logging(event_log_path):
+    """Attaches console and JSON lines handlers to the generator logger (once per path)."""
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    if not any(isinstance(h, logging.StreamHandler) and not isinstance(h, logging.FileHandler) for h in logger.handlers):
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(console)
+
+    event_log_path = os.path.abspath(event_log_path)
+    if not any(isinstance(h, logging.FileHandler) and h.baseFilename == event_log_path for h in logger.handlers):
+        file_handler = logging.FileHandler(event_log_path, encoding="utf-8")
+        file_handler.setFormatter(JsonLinesFormatter())
+        logger.addHandler(file_handler)
+
+# Function: log_event
+# Purpose: Logs a named event with structured fields
+# Input: Event name, human readable message, log level and extra fields
+# Output: None
+def log_event(event, message, level=logging.INFO, exc_info=False, **fields):
+    logger.log(level, message, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+def _series_key(name, labels):
+    if not labels:
+        return name
+    label_text = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{label_text}}}"
+
+# Class: Metrics
+# Purpose: In-process counters and histograms that can be written out as a snapshot file
+class Metrics:
+    def __init__(self):
+        self.started = time.time()
+        self.counters = defaultdict(int)
+        self.histograms = {}
+
+    def incr(self, name, value=1, **labels):
+        self.counters[_series_key(name, labels)] += value
+
+    def observe(self, name, value, **labels):
+        key = _series_key(name, labels)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = {
+                "count": 0,
+                "sum": 0.0,
+                "min": value,
+                "max": value,
+                "buckets": [0] * (len(duration_buckets) + 1),
+            }
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["min"] = min(histogram["min"], value)
+        histogram["max"] = max(histogram["max"], value)
+        for i, bound in enumerate(duration_buckets):
+            if value <= bound:
+                histogram["buckets"][i] += 1
+                break
+        else:
+            histogram["buckets"][-1] += 1
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Records the wall time of a block in the stage_duration_seconds histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def snapshot(self):
+        return {
+            "started": round(self.started, 3),
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "bucket_bounds": list(duration_buckets),
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {key: dict(value) for key, value in sorted(self.histograms.items())},
+        }
+
+    def write_snapshot(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+# Metrics shared by a single generator run
+metrics = Metrics()
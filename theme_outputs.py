@@ -0,0 +1,190 @@
+import io
+import os
+import csv
+import json
+import filecmp
+import tempfile
+from theme_metrics import metrics
+from theme_pipeline import Replacement
+
+def _replacement_mode(path):
+    # mkstemp creates owner-only files; keep the old file's mode or the usual default
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+# Function: write_if_changed
+# Purpose: Atomically writes a file, leaving it (and its mtime) untouched when the content is the same
+# Input: Output path and the new content as bytes or str (str is written as UTF-8)
+# Output: True if the file was written, False if it already held this content
+def write_if_changed(path, content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    try:
+        if os.path.getsize(path) == len(content):
+            with open(path, "rb") as f:
+                if f.read() == content:
+                    metrics.incr("outputs_unchanged")
+                    return False
+    except FileNotFoundError:
+        pass
+
+    # Write next to the target so os.replace stays on one filesystem and is atomic
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=folder)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(temp_path, _replacement_mode(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    metrics.incr("outputs_written")
+    return True
+
+# Class: AtomicStream
+# Purpose: Context manager that streams a file to a temporary file and swaps it in only if its content changed
+class AtomicStream:
+    """Atomic, change-aware write for outputs too big or too incremental to render to bytes first.
+
+    The temporary file sits next to the target so os.replace stays atomic. If the target already
+    holds the same bytes the temporary file is dropped and the target keeps its mtime; the
+    written attribute tells which happened once the with block is done.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.written = False
+
+    def __enter__(self):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, self.temp_path = tempfile.mkstemp(prefix=".tmp-", dir=folder)
+        self.file = os.fdopen(fd, "w+b")
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.close()
+        if exc_type is not None:
+            os.remove(self.temp_path)
+            return False
+        if os.path.exists(self.path) and filecmp.cmp(self.temp_path, self.path, shallow=False):
+            os.remove(self.temp_path)
+            metrics.incr("outputs_unchanged")
+            return False
+        try:
+            os.chmod(self.temp_path, _replacement_mode(self.path))
+            os.replace(self.temp_path, self.path)
+        except BaseException:
+            os.remove(self.temp_path)
+            raise
+        self.written = True
+        metrics.incr("outputs_written")
+        return False
+
+# Function: render_csv
+# Purpose: Renders CSV rows to a string the way csv.writer writes them to a file
+# Input: Header row and iterable of rows
+# Output: CSV text
+def render_csv(header, rows):
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+# Function: write_column_csv
+# Purpose: Writes per-column block counts or weights of one template to a CSV file
+# Input: Output path, name of the value column and the ColumnTables of the template
+# Output: True if the file was rewritten, False if it already held the same rows
+def write_column_csv(output_path, value_column, columns):
+    rows = ([table.column, table.processor_type, json.dumps(table.to_dict())] for table in columns)
+    return write_if_changed(output_path, render_csv(["Column", "ProcessorType", value_column], rows))
+
+# Function: render_json
+# Purpose: Renders a processors document exactly as it is written to disk
+# Input: Document dictionary, whose replacements may still be compact Replacement objects
+# Output: JSON text
+def render_json(document):
+    return json.dumps(document, indent=4, default=_json_shape)
+
+def _json_shape(value):
+    if isinstance(value, Replacement):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _replacement_steps(document):
+    steps = {}
+    for processor in (document or {}).get("processors", []):
+        if processor.get("processor_type") != "wotr:spot_gradient":
+            continue
+        for replacement in processor.get("replacements", []):
+            if isinstance(replacement, Replacement):
+                steps.setdefault(replacement.input_state, {}).update(replacement.items())
+                continue
+            block_steps = steps.setdefault(replacement["input_state"], {})
+            for step in replacement.get("output_steps", []):
+                block_steps[step["output_state"]] = step["step_size"]
+    return steps
+
+# Function: diff_documents
+# Purpose: Compares the spot_gradient replacements of two processors documents
+# Input: Previous document (or None) and new document
+# Output: Dictionary with added_states, removed_states and per-state gained/lost/changed output_steps
+def diff_documents(old_document, new_document):
+    """Semantic diff of two processors documents.
+
+    A state listed under changed_states gained output blocks, lost output blocks, or changed the
+    step_size of a block it already had. Ordering and formatting changes are not reported.
+    """
+    old_steps = _replacement_steps(old_document)
+    new_steps = _replacement_steps(new_document)
+
+    changed_states = {}
+    for input_state in old_steps.keys() & new_steps.keys():
+        old_blocks, new_blocks = old_steps[input_state], new_steps[input_state]
+        gained = {block: new_blocks[block] for block in new_blocks.keys() - old_blocks.keys()}
+        lost = {block: old_blocks[block] for block in old_blocks.keys() - new_blocks.keys()}
+        changed = {
+            block: [old_blocks[block], new_blocks[block]]
+            for block in old_blocks.keys() & new_blocks.keys()
+            if old_blocks[block] != new_blocks[block]
+        }
+        if gained or lost or changed:
+            changed_states[input_state] = {"gained": gained, "lost": lost, "changed": changed}
+
+    other_processors = [
+        [processor for processor in (document or {}).get("processors", []) if processor.get("processor_type") != "wotr:spot_gradient"]
+        for document in (old_document, new_document)
+    ]
+
+    return {
+        "added_states": sorted(new_steps.keys() - old_steps.keys()),
+        "removed_states": sorted(old_steps.keys() - new_steps.keys()),
+        "changed_states": dict(sorted(changed_states.items())),
+        "other_processors_changed": other_processors[0] != other_processors[1],
+    }
+
+# Function: read_document
+# Purpose: Reads a previously written processors document if there is one
+# Input: Path to the JSON file
+# Output: Document dictionary, or None when missing or unreadable
+def read_document(json_file_path):
+    try:
+        with open(json_file_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+# Function: write_document
+# Purpose: Writes a processors document only if it changed, and reports what changed semantically
+# Input: Output path and document dictionary
+# Output: Tuple of (written flag, diff dictionary from diff_documents)
+def write_document(json_file_path, document):
+    changes = diff_documents(read_document(json_file_path), document)
+    written = write_if_changed(json_file_path, render_json(document))
+    return written, changes
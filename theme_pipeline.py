@@ -0,0 +1,581 @@
+import os
+import sys
+import csv
+import json
+import logging
+from statistics import NormalDist
+from typing import NamedTuple
+import numpy as np
+from schem_decode import compile_palette, PaletteTables
+from schematic_readers import read_schematic, schematic_extensions, SchematicData
+from theme_metrics import log_event, metrics
+from theme_sources import open_theme_source
+
+# Processor templates: processor1-8 are required, processor9-15 are optional
+required_processors = range(1, 9)
+optional_processors = range(9, 16)
+
+# Function: normalize_weights
+# Purpose: Normalizes block counts into weights that sum to 1.0
+# Input: Dictionary of block counts
+# Output: Dictionary of normalized weights
+def normalize_weights(counts: dict[str, int]) -> dict[str, float]:
+    total = sum(counts.values())
+    if total == 0:
+        return {}
+
+    weights = {k: v / total for k, v in counts.items()}
+    rounded = {k: round(v, 3) for k, v in weights.items()}
+
+    # Ensure total sums to 1.0 (adjust for rounding error)
+    diff = round(1.0 - sum(rounded.values()), 3)
+    if diff != 0:
+        # Pick block with highest count; break ties by key order
+        max_blocks = [k for k, v in counts.items() if v == max(counts.values())]
+        target_block = sorted(max_blocks)[0]
+        rounded[target_block] = round(rounded[target_block] + diff, 3)
+
+    return rounded
+
+# Blocks to ignore during processing
+ignored_blocks = {
+    "minecraft:air",
+    "minecraft:void_air",
+    "minecraft:cave_air",
+    "minecraft:bedrock",
+}
+
+# Function: filter_blocks_to_ignore
+# Purpose: Filters out blocks that should be ignored during processing
+# Input: List of blocks to ignore and the block data
+# Output: Filtered block data
+def filter_blocks_to_ignore(block_data, blocks_to_ignore):
+    """Filters out blocks that are in the ignore list."""
+    return {block: count for block, count in block_data.items() if block not in blocks_to_ignore}
+
+# Class: ColumnTable
+# Purpose: Block counts or weights of one template column, as interned block names and one value array
+class ColumnTable:
+    """Compact stand-in for a {block: value} dictionary of one column.
+
+    Block names are interned so every table of every theme shares one string per block, and the
+    values live in a single NumPy array (int32 counts or float64 weights) instead of one boxed
+    number and dictionary slot per block.
+    """
+    __slots__ = ("column", "processor_type", "blocks", "values")
+
+    def __init__(self, column, processor_type, blocks, values):
+        self.column = column
+        self.processor_type = sys.intern(processor_type)
+        self.blocks = tuple(sys.intern(block) for block in blocks)
+        self.values = np.asarray(values)
+
+    @classmethod
+    def from_dict(cls, column, processor_type, block_values, dtype):
+        return cls(column, processor_type, block_values.keys(), np.fromiter(block_values.values(), dtype=dtype, count=len(block_values)))
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def items(self):
+        return zip(self.blocks, self.values.tolist())
+
+    def to_dict(self):
+        return dict(self.items())
+
+# Class: Replacement
+# Purpose: One spot_gradient replacement, kept compact until the document is serialized
+class Replacement:
+    __slots__ = ("input_state", "output_states", "step_sizes")
+
+    def __init__(self, input_state, output_states, step_sizes):
+        self.input_state = sys.intern(input_state)
+        self.output_states = tuple(sys.intern(state) for state in output_states)
+        self.step_sizes = np.asarray(step_sizes, dtype=np.float64)
+
+    def items(self):
+        return zip(self.output_states, self.step_sizes.tolist())
+
+    def to_json(self):
+        """The replacement in the shape it has in the processors document."""
+        return {
+            "input_state": self.input_state,
+            "output_steps": [
+                {
+                    "output_state": block,
+                    "step_size": weight
+                } for block, weight in self.items()
+            ]
+        }
+
+# Function: build_replacement
+# Purpose: Builds one spot_gradient replacement entry from block weights
+# Input: Processor block name (input_state) and dictionary of block weights
+# Output: Replacement, turned into its JSON shape by Replacement.to_json when the document is written
+def build_replacement(input_state, block_weights):
+    return Replacement(input_state, block_weights.keys(), list(block_weights.values()))
+
+# Function: processor_file_order
+# Purpose: Sort key that orders processor files by processor number (processor2 before processor10)
+# Input: File name
+# Output: Tuple sort key
+def processor_file_order(file):
+    digits = "".join(ch for ch in file if ch.isdigit())
+    return (int(digits) if digits else -1, file)
+
+# Function: read_column_csvs
+# Purpose: Reads the per-column JSON blobs of the BlockCounts or BlockWeights CSVs for one theme
+# Input: Folder holding the CSVs, file name suffix and the column holding the JSON
+# Output: Dictionary of input_state -> {block: value}, in the same order as the generated replacements
+def read_column_csvs(folder, file_suffix, value_column):
+    theme_values = {}
+    for file in sorted(os.listdir(folder), key=processor_file_order):
+        if not file.endswith(file_suffix):
+            continue
+        with open(os.path.join(folder, file), newline="") as f:
+            for row in csv.DictReader(f):
+                try:
+                    block_values = json.loads(row[value_column])
+                except json.JSONDecodeError:
+                    continue
+                if block_values:
+                    theme_values[row["ProcessorType"]] = block_values
+    return theme_values
+
+# Function: read_block_counts
+# Purpose: Reads the per-column block counts written by process_schematics for one theme
+# Input: Path to the theme's BlockCounts folder
+# Output: Dictionary of input_state -> {block: count}
+def read_block_counts(csv_counts_folder):
+    return read_column_csvs(csv_counts_folder, "_blockCounts.csv", "BlockCounts")
+
+# Function: read_block_weights
+# Purpose: Reads the per-column block weights written by process_schematics for one theme
+# Input: Path to the theme's BlockWeights folder
+# Output: Dictionary of input_state -> {block: weight}
+def read_block_weights(csv_weights_folder):
+    return read_column_csvs(csv_weights_folder, "_blockWeights.csv", "BlockWeights")
+
+# Class: DecodedSchematic
+# Purpose: One processor template decoded into palette lookup tables and flat palette indices
+class DecodedSchematic(NamedTuple):
+    processor_num: int
+    width: int
+    height: int
+    length: int
+    palette_tables: PaletteTables
+    block_data: np.ndarray  # Palette index per voxel, x fastest, then z, then y
+    kept: np.ndarray        # Flat positions of the voxels that are not ignored
+
+    def coordinates(self):
+        """x, y, z arrays of the kept voxels."""
+        y, rest = np.divmod(self.kept, self.length * self.width)
+        z, x = np.divmod(rest, self.width)
+        return x, y, z
+
+    def block_at(self, x, y, z):
+        """Block name at a position, or None when the block is ignored."""
+        palette_index = self.block_data[(y * self.length + z) * self.width + x]
+        if self.palette_tables.ignored[palette_index]:
+            return None
+        return self.palette_tables.block_names[self.palette_tables.block_ids[palette_index]]
+
+# Class: ColumnCounts
+# Purpose: Block counts of every column of one processor template
+class ColumnCounts(NamedTuple):
+    processor_num: int
+    columns: list  # ColumnTable of int32 counts per column, in column order
+
+# Class: ColumnWeights
+# Purpose: Normalized block weights of every column of one processor template
+class ColumnWeights(NamedTuple):
+    processor_num: int
+    columns: list  # ColumnTable of float64 weights per column, in column order
+
+# Class: ColumnEstimates
+# Purpose: Block counts of every column of one template, estimated from a stratified sample
+class ColumnEstimates(NamedTuple):
+    processor_num: int
+    columns: list    # ColumnTable of estimated int32 counts per column, usable wherever ColumnCounts.columns is
+    intervals: list  # ColumnTable per column of (low, high) confidence bounds of each block's share
+    sampled: int     # Voxels sampled per column, 0 when the template was counted exactly
+
+# Column regions of at most this many times the requested sample size are counted exactly
+exact_count_factor = 4
+
+# Function: load_schematics
+# Purpose: Stage 1 - loads the processor templates of a theme folder or archive
+# Input: Path to the theme folder, path to an archive holding one theme, or a theme_sources.ThemeSource
+# Output: Generator of (processor number, SchematicData), in processor order
+def load_schematics(theme_folder):
+    """Loads processorN templates in any format with a registered reader (.schem first).
+
+    Templates inside .zip and .tar.gz archives are read into memory and decoded from there,
+    without extracting anything to disk.
+    """
+    source = open_theme_source(theme_folder)
+    processor_files = {}
+    for processor_num in [*required_processors, *optional_processors]:
+        candidates = [f"processor{processor_num}{extension}" for extension in schematic_extensions()]
+        file_name = next((name for name in candidates if name in source.members), None)
+
+        if file_name is None:
+            if processor_num in required_processors:
+                schem_file = f"processor{processor_num}.schem"
+                metrics.incr("files_missing")
+                log_event("schematic_missing", f"❌ Missing required file: {schem_file}", logging.ERROR, file=schem_file)
+            continue
+        processor_files[file_name] = processor_num
+
+    for file_name, content in source.read_members(list(processor_files)):
+        with metrics.timer("read"):
+            schematic = read_schematic(content, name=file_name)
+        yield processor_files[file_name], schematic
+
+# Function: decode_schematic
+# Purpose: Decodes one schematic's palette and block data
+# Input: Processor number and the SchematicData from read_schematic
+# Output: DecodedSchematic
+def decode_schematic(processor_num, schematic: SchematicData):
+    with metrics.timer("decode"):
+        width, height, length = schematic.width, schematic.height, schematic.length
+        palette, block_data = schematic.palette, schematic.block_data
+
+        # Compile the palette into lookup tables (block names ignore properties like [facing=north])
+        palette_tables = compile_palette(palette, ignored_blocks, int(block_data.max(initial=0)))
+
+        # Flat positions of the blocks that are not ignored
+        kept = np.flatnonzero(~palette_tables.ignored[block_data])
+
+    metrics.incr("files_processed")
+    metrics.incr("voxels_decoded", width * height * length)
+    metrics.incr("voxels_meaningful", len(kept))
+    return DecodedSchematic(processor_num, width, height, length, palette_tables, block_data, kept)
+
+# Function: decode_schematics
+# Purpose: Stage 2 - decodes every loaded schematic
+# Input: Iterable of (processor number, SchematicData) from load_schematics
+# Output: Generator of DecodedSchematic
+def decode_schematics(schematics):
+    for processor_num, schematic in schematics:
+        yield decode_schematic(processor_num, schematic)
+
+# Function: detect_column_layout
+# Purpose: Infers which placeholder shape each template column stands for from its (0,0,z) block
+# Input: DecodedSchematic
+# Output: Tuple of ({column: processor type}, list of layout problems)
+def detect_column_layout(decoded):
+    """Reads the column layout off the template instead of a hard-coded suffix list.
+
+    Every column whose (0,0,z) block is one of this processor's placeholders (for example
+    wotr:processor_block_3_stairs) belongs to the layout, whatever its shape suffix is. Columns
+    without a placeholder there are not part of the layout and are never counted.
+    """
+    processor_base = f"wotr:processor_block_{decoded.processor_num}"
+    tables = decoded.palette_tables
+    if not tables.placeholder.any():
+        return {}, ["the palette has no wotr:processor_block placeholders"]
+
+    layout = {}
+    problems = []
+    # The (0,0,z) block of every column in one gather
+    corners = decoded.block_data[np.arange(decoded.length) * decoded.width]
+    for column in np.flatnonzero(tables.placeholder[corners]).tolist():
+        name = tables.block_names[tables.block_ids[corners[column]]]
+        suffix = name[len(processor_base):]
+        if not name.startswith(processor_base) or (suffix and not suffix.startswith("_")):
+            problems.append(f"column {column} has '{name}' at (0,0,{column}), which belongs to another processor")
+        elif name in layout.values():
+            problems.append(f"column {column} repeats '{name}' from column {next(c for c, n in layout.items() if n == name)}")
+        else:
+            layout[column] = name
+
+    if processor_base not in layout.values():
+        problems.append(f"no column has the base block '{processor_base}' at (0,0,z)")
+    return layout, problems
+
+# Function: log_column_layout
+# Purpose: Logs a template's column layout and warns about blocks in columns outside it
+# Input: DecodedSchematic and its layout from detect_column_layout
+# Output: None
+def log_column_layout(decoded, layout):
+    log_event("column_layout", f"processor{decoded.processor_num} layout: {len(layout)} columns",
+              processor=decoded.processor_num, layout={str(column): name for column, name in layout.items()})
+
+    # Columns holding blocks that are not ignored; a missing or misplaced placeholder drops them silently otherwise
+    filled = np.bincount(decoded.kept // decoded.width % decoded.length, minlength=decoded.length) > 0
+    filled[list(layout)] = False
+    unlaid = np.flatnonzero(filled).tolist()
+    if unlaid:
+        metrics.incr("columns_unlaid", len(unlaid))
+        log_event("columns_unlaid",
+                  f"⚠️ processor{decoded.processor_num}: not counting the blocks in column(s) {', '.join(map(str, unlaid))}, which have no placeholder at (0,0,z)",
+                  logging.WARNING, processor=decoded.processor_num, columns=unlaid)
+
+# Function: count_columns
+# Purpose: Counts the blocks of every column in a decoded template's placeholder layout
+# Input: DecodedSchematic
+# Output: ColumnCounts, or None when the template's placeholder layout is invalid
+def count_columns(decoded):
+    layout, problems = detect_column_layout(decoded)
+    for problem in problems:
+        metrics.incr("validation_failures")
+        log_event("placeholder_mismatch", f"❌ processor{decoded.processor_num}: {problem}",
+                  logging.ERROR, processor=decoded.processor_num, problem=problem)
+
+    if problems:
+        metrics.incr("columns_skipped", len(layout))
+        log_event("processor_skipped", f"⚠️ Skipping processor{decoded.processor_num} due to incorrect placeholder blocks",
+                  logging.WARNING, processor=decoded.processor_num, columns=len(layout))
+        return None
+
+    log_column_layout(decoded, layout)
+
+    with metrics.timer("count"):
+        tables = decoded.palette_tables
+        layout_columns = sorted(layout)
+        # Only the kept voxels are touched, so the work follows the meaningful blocks, not the bounding volume
+        slot_of_column = np.full(decoded.length, -1, dtype=np.int64)
+        slot_of_column[layout_columns] = np.arange(len(layout_columns))
+        voxel_slots = slot_of_column[decoded.kept // decoded.width % decoded.length]
+        in_layout = voxel_slots >= 0
+        column_slot = voxel_slots[in_layout]
+        block_ids = tables.block_ids[decoded.block_data[decoded.kept[in_layout]]]
+        id_count = len(tables.block_names)
+        # One key per (column, block) pair; blocks keep the order they first appear in within a column
+        pair_keys, first_seen, pair_counts = np.unique(column_slot * id_count + block_ids, return_index=True, return_counts=True)
+        order = np.argsort(first_seen, kind="stable")
+        pair_slots, pair_ids = np.divmod(pair_keys[order], id_count)
+        pair_counts = pair_counts[order].astype(np.int32)
+
+        columns = []
+        for slot, column in enumerate(layout_columns):
+            processor_type = layout[column]
+            # The column's pairs, without the processor block itself
+            in_column = (pair_slots == slot) & (pair_ids != tables.block_names.index(processor_type))
+            names = [tables.block_names[block_id] for block_id in pair_ids[in_column].tolist()]
+            columns.append(ColumnTable(column, processor_type, names, pair_counts[in_column]))
+
+    metrics.incr("columns_counted", len(columns))
+    return ColumnCounts(decoded.processor_num, columns)
+
+# Function: count_all_columns
+# Purpose: Stage 3 - counts the columns of every decoded template, dropping invalid templates
+# Input: Iterable of DecodedSchematic
+# Output: Generator of ColumnCounts
+def count_all_columns(decoded_schematics):
+    for decoded in decoded_schematics:
+        counted = count_columns(decoded)
+        if counted is not None:
+            yield counted
+
+# Function: estimate_columns
+# Purpose: Estimates the block counts of every layout column from a stratified random sample of voxels
+# Input: DecodedSchematic, sample size per column, random seed and confidence level of the intervals
+# Output: ColumnEstimates, or None when the template's placeholder layout is invalid
+def estimate_columns(decoded, samples_per_column=4096, seed=0, confidence=0.95):
+    """Approximate count_columns for very large templates.
+
+    Each column region (the height x width slab at one z) is split into strata of consecutive
+    layers, and every stratum gets a share of the samples proportional to its size. Counts are
+    the stratified estimates of each block's total; a block's share of the column is a ratio
+    estimate whose confidence interval uses the stratified ratio variance. Regions small enough
+    to count outright (exact_count_factor times the sample size) are counted exactly instead.
+    """
+    if samples_per_column < 1:
+        raise ValueError(f"samples_per_column must be at least 1, got {samples_per_column}")
+    layout, problems = detect_column_layout(decoded)
+    region_voxels = decoded.height * decoded.width
+    if problems or region_voxels <= exact_count_factor * samples_per_column:
+        counted = count_columns(decoded)
+        if counted is None:
+            return None
+        intervals = []
+        for table in counted.columns:
+            shares = table.values / max(int(table.values.sum()), 1)
+            intervals.append(ColumnTable(table.column, table.processor_type, table.blocks, np.stack([shares, shares], axis=1)))
+        return ColumnEstimates(decoded.processor_num, counted.columns, intervals, 0)
+
+    log_column_layout(decoded, layout)
+
+    with metrics.timer("estimate"):
+        tables = decoded.palette_tables
+        layout_columns = np.array(sorted(layout))
+        id_count = len(tables.block_names)
+        z_score = NormalDist().inv_cdf((1 + confidence) / 2)
+
+        # Strata of consecutive layers with at least two samples each, so every stratum has a variance
+        strata = max(1, min(decoded.height, samples_per_column // 2))
+        edges = np.linspace(0, decoded.height, strata + 1).round().astype(np.int64)
+        stratum_voxels = np.diff(edges) * decoded.width
+        stratum_samples = np.maximum(2, np.round(samples_per_column * stratum_voxels / region_voxels)).astype(np.int64)
+        sample_stratum = np.repeat(np.arange(strata), stratum_samples)
+
+        # Positions with replacement inside each stratum, for every column at once
+        rng = np.random.default_rng(seed)
+        offsets = rng.integers(0, stratum_voxels[sample_stratum], size=(len(layout_columns), len(sample_stratum)))
+        y = edges[sample_stratum] + offsets // decoded.width
+        x = offsets % decoded.width
+        palette_indices = decoded.block_data[(y * decoded.length + layout_columns[:, None]) * decoded.width + x]
+        sampled_ids = tables.block_ids[palette_indices]
+
+        columns = []
+        intervals = []
+        for slot, column in enumerate(layout_columns.tolist()):
+            processor_type = layout[column]
+            ids = sampled_ids[slot]
+            # Meaningful samples: not ignored and not the column's own processor block
+            meaningful = ~tables.ignored[palette_indices[slot]] & (ids != tables.block_names.index(processor_type))
+            strata_of = sample_stratum[meaningful]
+            ids = ids[meaningful]
+
+            # Per stratum: samples of each block and of any meaningful block
+            block_hits = np.bincount(strata_of * id_count + ids, minlength=strata * id_count).reshape(strata, id_count)
+            meaningful_hits = block_hits.sum(axis=1)
+            expansion = stratum_voxels / stratum_samples  # Voxels each sample stands for, per stratum
+            block_totals = expansion @ block_hits
+            meaningful_total = float(expansion @ meaningful_hits)
+
+            # Blocks in the order they first show up in the sample, like count_columns
+            seen_ids, first_seen = np.unique(ids, return_index=True)
+            seen_ids = seen_ids[np.argsort(first_seen, kind="stable")]
+            names = [tables.block_names[block_id] for block_id in seen_ids.tolist()]
+            counts = np.maximum(1, np.round(block_totals[seen_ids])).astype(np.int32)
+            columns.append(ColumnTable(column, processor_type, names, counts))
+
+            if meaningful_total == 0:
+                intervals.append(ColumnTable(column, processor_type, names, np.zeros((len(names), 2))))
+                continue
+            # Ratio estimator variance: residuals d = y - R x are (1 - R) for the block, -R for other meaningful samples
+            shares = block_totals[seen_ids] / meaningful_total
+            hits = block_hits[:, seen_ids]
+            n = stratum_samples[:, None]
+            residual_sum = hits - meaningful_hits[:, None] * shares
+            residual_squares = hits * (1 - shares) ** 2 + (meaningful_hits[:, None] - hits) * shares ** 2
+            stratum_variance = (residual_squares - residual_sum ** 2 / n) / (n - 1)
+            share_variance = (stratum_voxels[:, None] ** 2 * stratum_variance / n).sum(axis=0) / meaningful_total ** 2
+            margin = z_score * np.sqrt(np.maximum(share_variance, 0))
+            bounds = np.stack([np.clip(shares - margin, 0, 1), np.clip(shares + margin, 0, 1)], axis=1)
+            intervals.append(ColumnTable(column, processor_type, names, bounds))
+
+    metrics.incr("columns_estimated", len(columns))
+    metrics.incr("voxels_sampled", len(layout_columns) * len(sample_stratum))
+    return ColumnEstimates(decoded.processor_num, columns, intervals, len(sample_stratum))
+
+# Function: estimate_all_columns
+# Purpose: Stage 3 (approximate) - estimates the columns of every decoded template, dropping invalid templates
+# Input: Iterable of DecodedSchematic, sample size per column and random seed
+# Output: Generator of ColumnEstimates
+def estimate_all_columns(decoded_schematics, samples_per_column=4096, seed=0):
+    for decoded in decoded_schematics:
+        estimated = estimate_columns(decoded, samples_per_column, seed)
+        if estimated is not None:
+            yield estimated
+
+# Function: weigh_columns
+# Purpose: Turns the column counts of one template into normalized weights
+# Input: ColumnCounts or ColumnEstimates
+# Output: ColumnWeights
+def weigh_columns(counted):
+    with metrics.timer("weights"):
+        columns = [
+            ColumnTable.from_dict(
+                table.column, table.processor_type,
+                normalize_weights(filter_blocks_to_ignore(table.to_dict(), ignored_blocks)), np.float64,
+            )
+            for table in counted.columns
+        ]
+    return ColumnWeights(counted.processor_num, columns)
+
+# Function: weigh_all_columns
+# Purpose: Stage 4 - computes the weights of every counted template
+# Input: Iterable of ColumnCounts
+# Output: Generator of ColumnWeights
+def weigh_all_columns(counted_processors):
+    for counted in counted_processors:
+        yield weigh_columns(counted)
+
+# Function: build_replacements
+# Purpose: Stage 5 - turns column weights into spot_gradient replacements
+# Input: Iterable of ColumnWeights
+# Output: Generator of Replacement, one per column
+def build_replacements(weighted_processors):
+    for weighted in weighted_processors:
+        for table in weighted.columns:
+            yield Replacement(table.processor_type, table.blocks, table.values)
+
+# Function: theme_replacements
+# Purpose: Runs stages 1-5 for a theme folder
+# Input: Theme folder, archive or ThemeSource, and a sample size per column to estimate counts instead of counting them
+# Output: Generator of Replacement
+def theme_replacements(theme_folder, samples_per_column=None):
+    decoded = decode_schematics(load_schematics(theme_folder))
+    if samples_per_column:
+        counted = estimate_all_columns(decoded, samples_per_column)
+    else:
+        counted = count_all_columns(decoded)
+    return build_replacements(weigh_all_columns(counted))
+
+# Function: build_theme_document
+# Purpose: Runs the whole pipeline for a theme folder without writing any file
+# Input: Theme folder, archive or ThemeSource, the selected features (noise scales, rarities, attachments) and an optional sample size
+# Output: Processors document dictionary (write it with theme_outputs.render_json)
+def build_theme_document(theme_folder, selected_features, samples_per_column=None):
+    return build_processor_document(list(theme_replacements(theme_folder, samples_per_column)), selected_features)
+
+# Function: build_processor_document
+# Purpose: Builds the processor list document from replacements and the selected features
+# Input: List of spot_gradient Replacements and the options chosen in show_checklist_popup
+# Output: Dictionary ready to be written as JSON by theme_outputs.render_json
+def build_processor_document(processor_replacements, selected_features):
+    endnote = []
+    for feature, rarity in selected_features.items():
+        if rarity is not None:
+            if feature == "mushroom":
+                endnote.append({"processor_type": "wotr:mushrooms", "rarity": rarity})
+            elif feature == "vines":
+                endnote.append({"processor_type": "wotr:vines", "rarity": rarity})
+            elif feature == "chest":
+                endnote.append({
+                    "processor_type": "wotr:rift_chests",
+                    "base_loot_table": "wotr:chests/",
+                    "rarity": rarity,
+                    "chest_types": [{"chest_type": "wooden", "weight": 1}]
+                })
+
+    if "attachments" in selected_features:
+        for attachment in selected_features["attachments"]:
+            if attachment["name"]:
+                attachment_data = {
+                    "processor_type": "wotr:attachment",
+                    "requires_sides": int(attachment["sides"] if attachment["sides"].strip() else 0),
+                    "requires_up": bool(attachment["up"]),
+                    "requires_down": bool(attachment["down"]),
+                    "rarity": float(attachment["rarity"] if attachment["rarity"].strip() else 0),
+                    "blockstate": {
+                        "Name": attachment["name"],
+                        "Properties": {
+                            property: value
+                            for property, value in [
+                                (attachment["property_1"], attachment["value_1"]),
+                                (attachment["property_2"], attachment["value_2"])
+                            ]
+                            if property and value
+                        }
+                    }
+                }
+                endnote.append(attachment_data)
+
+    return {
+        "processors": [
+            {
+                "processor_type": "wotr:spot_gradient",
+                "noise_scale_x": selected_features.get("noise_scale_x", 0.075),
+                "noise_scale_y": selected_features.get("noise_scale_y", 0.075),
+                "noise_scale_z": selected_features.get("noise_scale_z", 0.075),
+                "replacements": processor_replacements,
+                
+            },
+            *endnote
+        ]
+    }
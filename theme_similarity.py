@@ -0,0 +1,255 @@
+import os
+import argparse
+import numpy as np
+from theme_cli import base_folder
+from theme_pipeline import read_block_counts
+
+# Default location of the on-disk index, next to the themes
+default_index_path = os.path.join(base_folder, "theme_similarity_index.npz")
+
+metrics_available = ("cosine", "tv")
+
+# Function: find_theme_count_folders
+# Purpose: Lists every theme folder under a root that has BlockCounts output
+# Input: Root folder holding the theme folders
+# Output: Sorted list of (theme name, BlockCounts folder)
+def find_theme_count_folders(themes_root):
+    found = []
+    for entry in os.scandir(themes_root):
+        counts_folder = os.path.join(entry.path, "BlockCounts")
+        if entry.is_dir() and os.path.isdir(counts_folder):
+            found.append((entry.name, counts_folder))
+    return sorted(found)
+
+# Function: build_similarity_index
+# Purpose: Builds a sparse matrix of per-theme, per-input_state block distributions and saves it
+# Input: Root folder holding the theme folders and the output index path
+# Output: The built SimilarityIndex
+def build_similarity_index(themes_root, index_path=default_index_path):
+    theme_names = []
+    rows = []  # (state, theme index, {block: count})
+    for theme_name, counts_folder in find_theme_count_folders(themes_root):
+        theme_index = len(theme_names)
+        theme_names.append(theme_name)
+        for input_state, block_counts in read_block_counts(counts_folder).items():
+            rows.append((input_state, theme_index, block_counts))
+
+    # Rows are grouped by input_state so each state's rows form one contiguous slice
+    rows.sort(key=lambda row: (row[0], row[1]))
+    states = sorted({row[0] for row in rows})
+    blocks = sorted({block for row in rows for block in row[2]})
+    state_ids = {state: i for i, state in enumerate(states)}
+    block_ids = {block: i for i, block in enumerate(blocks)}
+
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indices = []
+    data = []
+    for i, (_, _, block_counts) in enumerate(rows):
+        total = sum(block_counts.values())
+        for block, count in sorted(block_counts.items(), key=lambda item: block_ids[item[0]]):
+            indices.append(block_ids[block])
+            data.append(count / total)
+        indptr[i + 1] = len(indices)
+
+    index = SimilarityIndex(
+        themes=np.array(theme_names, dtype=str),
+        states=np.array(states, dtype=str),
+        blocks=np.array(blocks, dtype=str),
+        row_theme=np.array([row[1] for row in rows], dtype=np.int32),
+        row_state=np.array([state_ids[row[0]] for row in rows], dtype=np.int32),
+        indptr=indptr,
+        indices=np.array(indices, dtype=np.int32),
+        data=np.array(data, dtype=np.float32),
+    )
+    index.save(index_path)
+    return index
+
+# Class: SimilarityIndex
+# Purpose: Compressed sparse rows of block distributions with batch nearest-neighbour queries
+class SimilarityIndex:
+    def __init__(self, themes, states, blocks, row_theme, row_state, indptr, indices, data):
+        self.themes = themes
+        self.states = states
+        self.blocks = blocks
+        self.row_theme = row_theme
+        self.row_state = row_state
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+        self.theme_ids = {name: i for i, name in enumerate(themes.tolist())}
+        self.state_ids = {name: i for i, name in enumerate(states.tolist())}
+        self.block_ids = {name: i for i, name in enumerate(blocks.tolist())}
+        # Row range of each state, relying on rows being sorted by state
+        self.state_offsets = np.searchsorted(row_state, np.arange(len(states) + 1))
+        # Owning row of every stored value, and the L2 norm of every row for cosine queries
+        self.nnz_row = np.repeat(np.arange(len(row_theme), dtype=np.int64), np.diff(indptr))
+        self.row_norms = np.sqrt(np.bincount(self.nnz_row, weights=data.astype(np.float64) ** 2, minlength=len(row_theme)))
+
+    @classmethod
+    def load(cls, index_path=default_index_path):
+        with np.load(index_path) as stored:
+            return cls(**{name: stored[name] for name in stored.files})
+
+    def save(self, index_path=default_index_path):
+        np.savez_compressed(
+            index_path,
+            themes=self.themes,
+            states=self.states,
+            blocks=self.blocks,
+            row_theme=self.row_theme,
+            row_state=self.row_state,
+            indptr=self.indptr,
+            indices=self.indices,
+            data=self.data,
+        )
+
+    def row_vector(self, row):
+        """Returns one stored row as a dense distribution over the index vocabulary."""
+        vector = np.zeros(len(self.blocks), dtype=np.float64)
+        start, end = self.indptr[row], self.indptr[row + 1]
+        vector[self.indices[start:end]] = self.data[start:end]
+        return vector
+
+    def vector_from_counts(self, block_counts):
+        """Turns a {block: count} mapping into a dense distribution; unknown blocks keep their share of the mass."""
+        vector = np.zeros(len(self.blocks), dtype=np.float64)
+        total = sum(block_counts.values())
+        if total == 0:
+            return vector
+        for block, count in block_counts.items():
+            block_id = self.block_ids.get(block)
+            if block_id is not None:
+                vector[block_id] = count / total
+        return vector
+
+    def state_distances(self, input_state, query, metric="cosine"):
+        """Distances from a dense query distribution to every stored row of one input_state.
+
+        Returns (row ids, distances). Both metrics only need the stored values at the query's
+        non-zero blocks, so the work is a gather plus a bincount over the state's slice.
+        """
+        if metric not in metrics_available:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {metrics_available}")
+        state_id = self.state_ids.get(input_state)
+        if state_id is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        first_row, end_row = self.state_offsets[state_id], self.state_offsets[state_id + 1]
+        start, end = self.indptr[first_row], self.indptr[end_row]
+        local_rows = self.nnz_row[start:end] - first_row
+        stored = self.data[start:end].astype(np.float64)
+        at_query = query[self.indices[start:end]]
+        row_count = end_row - first_row
+
+        if metric == "cosine":
+            dots = np.bincount(local_rows, weights=stored * at_query, minlength=row_count)
+            norms = self.row_norms[first_row:end_row] * np.linalg.norm(query)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                distances = np.where(norms > 0, 1.0 - dots / norms, 1.0)
+        else:
+            # Total variation between two distributions is 1 - sum(min(p, q))
+            overlap = np.bincount(local_rows, weights=np.minimum(stored, at_query), minlength=row_count)
+            distances = 1.0 - overlap
+
+        return np.arange(first_row, end_row), np.clip(distances, 0.0, 1.0)
+
+    def nearest_columns(self, input_state, query, k=5, metric="cosine", exclude_theme=None):
+        """Nearest stored (theme, input_state) rows to a single processor column."""
+        rows, distances = self.state_distances(input_state, query, metric)
+        if exclude_theme is not None and exclude_theme in self.theme_ids:
+            keep = self.row_theme[rows] != self.theme_ids[exclude_theme]
+            rows, distances = rows[keep], distances[keep]
+        order = np.argsort(distances, kind="stable")[:k]
+        return [(str(self.themes[self.row_theme[rows[i]]]), float(distances[i])) for i in order]
+
+    def theme_rows(self, theme_name):
+        theme_id = self.theme_ids[theme_name]
+        return np.flatnonzero(self.row_theme == theme_id)
+
+    def nearest_themes(self, theme_name, k=5, metric="cosine"):
+        """Nearest stored themes to a stored theme."""
+        columns = [(str(self.states[self.row_state[row]]), self.row_vector(row)) for row in self.theme_rows(theme_name)]
+        return self._nearest_to_columns(columns, k, metric, exclude_theme=theme_name)
+
+    def nearest_themes_to_counts(self, theme_counts, k=5, metric="cosine"):
+        """Nearest stored themes to a theme that need not be in the index, from its read_block_counts mapping."""
+        columns = [
+            (input_state, self.vector_from_counts(block_counts))
+            for input_state, block_counts in theme_counts.items()
+            if sum(block_counts.values()) > 0
+        ]
+        return self._nearest_to_columns(columns, k, metric)
+
+    def _nearest_to_columns(self, columns, k, metric, exclude_theme=None):
+        """Ranks stored themes by their column distances to (input_state, distribution) pairs, averaged.
+
+        A theme missing one of the query's input_states counts as maximally distant for that column.
+        """
+        if not columns:
+            return []
+        totals = np.zeros(len(self.themes), dtype=np.float64)
+        for state, query in columns:
+            rows, distances = self.state_distances(state, query, metric)
+            # Start from the maximum distance and replace it for themes that have this column
+            column_distance = np.ones(len(self.themes), dtype=np.float64)
+            column_distance[self.row_theme[rows]] = distances
+            totals += column_distance
+
+        mean_distances = totals / len(columns)
+        if exclude_theme is not None:
+            mean_distances[self.theme_ids[exclude_theme]] = np.inf
+        order = np.argsort(mean_distances, kind="stable")[:k]
+        return [(str(self.themes[i]), float(mean_distances[i])) for i in order if np.isfinite(mean_distances[i])]
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the cross-theme block distribution index.")
+    parser.add_argument("--index", default=default_index_path, help="Path of the .npz index file")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Rebuild the index from every theme's BlockCounts")
+    build_parser.add_argument("--root", default=base_folder, help="Folder containing the theme folders")
+
+    query_parser = subparsers.add_parser("query", help="Find the themes closest to a theme or one of its columns")
+    query_parser.add_argument("theme", nargs="?", help="Indexed theme to compare")
+    query_parser.add_argument("--counts", help="BlockCounts folder to compare instead, for a theme or columns not indexed yet")
+    query_parser.add_argument("--state", help="Only compare this input_state, e.g. wotr:processor_block_1_slab")
+    query_parser.add_argument("-k", type=int, default=5)
+    query_parser.add_argument("--metric", choices=metrics_available, default="cosine")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        index = build_similarity_index(args.root, args.index)
+        print(f"✅ Indexed {len(index.themes)} themes, {len(index.row_theme)} columns, {len(index.blocks)} blocks")
+        return
+
+    index = SimilarityIndex.load(args.index)
+    if (args.theme is None) == (args.counts is None):
+        parser.error("Give either an indexed theme or --counts")
+
+    if args.counts:
+        if not os.path.isdir(args.counts):
+            parser.error(f"{args.counts} is not a BlockCounts folder")
+        theme_counts = read_block_counts(args.counts)
+        if args.state:
+            if args.state not in theme_counts:
+                parser.error(f"{args.counts} has no column for {args.state}")
+            results = index.nearest_columns(args.state, index.vector_from_counts(theme_counts[args.state]), args.k, args.metric)
+        else:
+            results = index.nearest_themes_to_counts(theme_counts, args.k, args.metric)
+    elif args.theme not in index.theme_ids:
+        parser.error(f"Theme '{args.theme}' is not in the index, rebuild it first")
+    elif args.state:
+        rows = [row for row in index.theme_rows(args.theme) if index.states[index.row_state[row]] == args.state]
+        if not rows:
+            parser.error(f"Theme '{args.theme}' has no column for {args.state}")
+        results = index.nearest_columns(args.state, index.row_vector(rows[0]), args.k, args.metric, exclude_theme=args.theme)
+    else:
+        results = index.nearest_themes(args.theme, args.k, args.metric)
+
+    for theme_name, distance in results:
+        print(f"{distance:.4f}  {theme_name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import os
+import tarfile
+import zipfile
+import posixpath
+from abc import ABC, abstractmethod
+from schematic_readers import schematic_extensions
+
+# Archive file endings a theme can be stored in
+archive_extensions = (".zip", ".tar.gz", ".tgz", ".tar")
+
+# Function: is_processor_file
+# Purpose: Tells whether a file name is a processorN template in a readable format
+# Input: File name without folders
+# Output: True or False
+def is_processor_file(name):
+    stem, extension = os.path.splitext(name)
+    return extension.lower() in schematic_extensions() and stem.startswith("processor") and stem[len("processor"):].isdigit()
+
+# Function: is_archive
+# Purpose: Tells whether a path names a theme archive
+# Input: File path
+# Output: True or False
+def is_archive(path):
+    return path.lower().endswith(archive_extensions)
+
+def _archive_stem(path):
+    name = os.path.basename(path)
+    for extension in archive_extensions:
+        if name.lower().endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+def _skipped_member(member_name):
+    # Resource forks and metadata that zips made on macOS carry along
+    return member_name.startswith("__MACOSX/") or posixpath.basename(member_name).startswith("._")
+
+# Class: ThemeSource
+# Purpose: The processor templates of one theme, wherever they are stored
+class ThemeSource(ABC):
+    __slots__ = ("name", "location", "members")
+
+    def __init__(self, name, location, members):
+        self.name = name            # Theme name
+        self.location = location    # Folder or archive path
+        self.members = members      # Processor file name -> path or member name inside the archive
+
+    @abstractmethod
+    def read_members(self, names):
+        """Yields (file name, path or bytes) for the given processor files, in the given order."""
+
+# Class: FolderTheme
+# Purpose: Theme whose templates are files in a folder
+class FolderTheme(ThemeSource):
+    __slots__ = ()
+
+    def read_members(self, names):
+        for name in names:
+            yield name, self.members[name]
+
+# Class: ZipTheme
+# Purpose: Theme whose templates are members of a zip archive
+class ZipTheme(ThemeSource):
+    __slots__ = ()
+
+    def read_members(self, names):
+        with zipfile.ZipFile(self.location) as archive:
+            for name in names:
+                yield name, archive.read(self.members[name])
+
+# Class: TarTheme
+# Purpose: Theme whose templates are members of a (possibly compressed) tar archive
+class TarTheme(ThemeSource):
+    __slots__ = ()
+
+    def read_members(self, names):
+        """Reads the wanted members in one forward pass over the stream, then yields them in order.
+
+        Seeking backwards in a compressed tar decompresses it again from the start, so members
+        are collected in archive order; templates are small next to the rest of a theme archive.
+        """
+        wanted = {self.members[name]: name for name in names}
+        found = {}
+        with tarfile.open(self.location, "r|*") as archive:
+            for member in archive:
+                if member.name in wanted:
+                    found[wanted[member.name]] = archive.extractfile(member).read()
+                    if len(found) == len(wanted):
+                        break
+        for name in names:
+            yield name, found[name]
+
+def _group_members(member_names):
+    # Folder inside the archive -> {processor file name: member name}
+    groups = {}
+    for member_name in member_names:
+        # "tar czf t.tar.gz -C theme ." stores ./processor1.schem; it sits at the top like processor1.schem
+        path = posixpath.normpath(member_name)
+        if _skipped_member(path):
+            continue
+        folder, name = posixpath.split(path)
+        if is_processor_file(name):
+            groups.setdefault(folder, {})[name] = member_name
+    return groups
+
+# Function: archive_themes
+# Purpose: Lists the themes stored in one archive without extracting it
+# Input: Path to a .zip, .tar.gz, .tgz or .tar archive
+# Output: List of ThemeSource, one per folder of the archive holding processor templates
+def archive_themes(archive_path):
+    """Finds the themes in an archive.
+
+    Templates at the top of the archive form a theme named after the archive; templates in a
+    folder form a theme named after the folder, so one archive can carry a whole theme library.
+    """
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            member_names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        theme_class = ZipTheme
+    else:
+        with tarfile.open(archive_path, "r|*") as archive:
+            member_names = [member.name for member in archive if member.isfile()]
+        theme_class = TarTheme
+
+    return [
+        theme_class(posixpath.basename(folder) or _archive_stem(archive_path), archive_path, members)
+        for folder, members in sorted(_group_members(member_names).items())
+    ]
+
+# Function: folder_theme
+# Purpose: Describes a theme folder's processor templates
+# Input: Path to the theme folder
+# Output: FolderTheme (with no members when the folder holds no templates)
+def folder_theme(theme_folder):
+    names = os.listdir(theme_folder) if os.path.isdir(theme_folder) else []
+    members = {name: os.path.join(theme_folder, name) for name in names if is_processor_file(name)}
+    return FolderTheme(os.path.basename(os.path.normpath(theme_folder)), theme_folder, members)
+
+# Function: open_theme_source
+# Purpose: Opens a theme given as a folder, an archive holding one theme or an existing ThemeSource
+# Input: Folder path, archive path or ThemeSource
+# Output: ThemeSource
+def open_theme_source(theme):
+    if isinstance(theme, ThemeSource):
+        return theme
+    if is_archive(theme) and os.path.isfile(theme):
+        themes = archive_themes(theme)
+        if len(themes) != 1:
+            raise ValueError(f"{theme} holds {len(themes)} themes; pick one from archive_themes() instead")
+        return themes[0]
+    return folder_theme(theme)
+
+# Function: find_theme_sources
+# Purpose: Finds every theme under a path: theme folders, archives and folders of archives
+# Input: Folder or archive path
+# Output: List of ThemeSource in name order
+def find_theme_sources(path):
+    if os.path.isfile(path):
+        return archive_themes(path) if is_archive(path) else []
+
+    theme = folder_theme(path)
+    if theme.members:
+        return [theme]
+
+    sources = []
+    for entry in sorted(os.scandir(path), key=lambda e: e.name):
+        if entry.name.startswith("."):
+            continue
+        if entry.is_file() and is_archive(entry.name):
+            sources.extend(archive_themes(entry.path))
+        elif entry.is_dir():
+            theme = folder_theme(entry.path)
+            if theme.members:
+                sources.append(theme)
+    return sources
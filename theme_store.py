@@ -0,0 +1,160 @@
+import os
+import csv
+import json
+import sqlite3
+import argparse
+import numpy as np
+from theme_cli import base_folder
+from theme_pipeline import ColumnTable, processor_file_order
+
+# Default database location, next to the themes. process_csv_to_json only records into it when it exists.
+default_store_path = os.path.join(base_folder, "theme_block_counts.sqlite")
+
+schema = """
+CREATE TABLE IF NOT EXISTS themes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS block_counts (
+    theme_id INTEGER NOT NULL REFERENCES themes(id),
+    processor INTEGER NOT NULL,
+    column_index INTEGER NOT NULL,
+    processor_type TEXT NOT NULL,
+    shape TEXT NOT NULL,
+    block_id INTEGER NOT NULL REFERENCES blocks(id),
+    count INTEGER NOT NULL,
+    PRIMARY KEY (theme_id, processor, column_index, block_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS block_counts_by_block ON block_counts (block_id, shape);
+CREATE INDEX IF NOT EXISTS block_counts_by_type ON block_counts (processor_type);
+"""
+
+# Function: shape_of
+# Purpose: Gives the shape suffix of a placeholder block name
+# Input: Processor number and processor type, e.g. 1 and wotr:processor_block_1_stairs
+# Output: Shape suffix, e.g. "_stairs"; "" for the base block
+def shape_of(processor_num, processor_type):
+    return processor_type[len(f"wotr:processor_block_{processor_num}"):]
+
+# Class: BlockCountStore
+# Purpose: Indexed SQLite copy of per-column block counts across all themes
+class BlockCountStore:
+    def __init__(self, store_path=default_store_path):
+        self.connection = sqlite3.connect(store_path)
+        self.connection.executescript(schema)
+        self.block_ids = dict(self.connection.execute("SELECT name, id FROM blocks"))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _theme_id(self, theme_name):
+        self.connection.execute("INSERT OR IGNORE INTO themes (name) VALUES (?)", (theme_name,))
+        return self.connection.execute("SELECT id FROM themes WHERE name = ?", (theme_name,)).fetchone()[0]
+
+    def _block_ids_for(self, names):
+        missing = [(name,) for name in names if name not in self.block_ids]
+        if missing:
+            self.connection.executemany("INSERT OR IGNORE INTO blocks (name) VALUES (?)", missing)
+            self.block_ids = dict(self.connection.execute("SELECT name, id FROM blocks"))
+        return self.block_ids
+
+    def replace_processor(self, theme_name, processor_num, columns):
+        """Replaces one processor's rows with its column count ColumnTables in one transaction."""
+        with self.connection:
+            theme_id = self._theme_id(theme_name)
+            block_ids = self._block_ids_for({block for table in columns for block in table.blocks})
+            self.connection.execute("DELETE FROM block_counts WHERE theme_id = ? AND processor = ?", (theme_id, processor_num))
+            self.connection.executemany(
+                "INSERT INTO block_counts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (theme_id, processor_num, table.column, table.processor_type, shape_of(processor_num, table.processor_type), block_ids[block], count)
+                    for table in columns
+                    for block, count in table.items()
+                ),
+            )
+
+    def ingest_counts_folder(self, theme_name, csv_counts_folder):
+        """Loads a theme's existing BlockCounts CSVs, e.g. to backfill themes processed before the store existed."""
+        ingested = 0
+        for file in sorted(os.listdir(csv_counts_folder), key=processor_file_order):
+            if not file.endswith("_blockCounts.csv"):
+                continue
+            processor_num = processor_file_order(file)[0]
+            columns = []
+            with open(os.path.join(csv_counts_folder, file), newline="") as f:
+                for row in csv.DictReader(f):
+                    try:
+                        columns.append(ColumnTable.from_dict(int(row["Column"]), row["ProcessorType"], json.loads(row["BlockCounts"]), np.int32))
+                    except (ValueError, json.JSONDecodeError):
+                        continue
+            self.replace_processor(theme_name, processor_num, columns)
+            ingested += 1
+        return ingested
+
+    def query(self, block=None, shape=None, theme=None, processor_type=None):
+        """Rows of (theme, processor, column, processor type, block, count) matching every given filter."""
+        conditions, parameters = [], []
+        for clause, value in [
+            ("b.name = ?", block),
+            ("c.shape = ?", shape),
+            ("t.name = ?", theme),
+            ("c.processor_type = ?", processor_type),
+        ]:
+            if value is not None:
+                conditions.append(clause)
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.connection.execute(
+            f"""SELECT t.name, c.processor, c.column_index, c.processor_type, b.name, c.count
+                FROM block_counts c
+                JOIN themes t ON t.id = c.theme_id
+                JOIN blocks b ON b.id = c.block_id
+                {where}
+                ORDER BY t.name, c.processor, c.column_index, b.name""",
+            parameters,
+        ).fetchall()
+
+def main():
+    parser = argparse.ArgumentParser(description="Query block counts across every theme.")
+    parser.add_argument("--db", default=default_store_path, help="Path of the SQLite database")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Load every theme's BlockCounts CSVs into the database")
+    ingest_parser.add_argument("--root", default=base_folder, help="Folder containing the theme folders")
+
+    query_parser = subparsers.add_parser("query", help="List matching counts, e.g. --block minecraft:deepslate --shape _stairs")
+    query_parser.add_argument("--block")
+    query_parser.add_argument("--shape", help="Shape suffix of the column, e.g. _stairs; use '' for base blocks")
+    query_parser.add_argument("--theme")
+    query_parser.add_argument("--processor-type")
+    query_parser.add_argument("--themes-only", action="store_true", help="Only list the matching theme names")
+
+    args = parser.parse_args()
+    with BlockCountStore(args.db) as store:
+        if args.command == "ingest":
+            for entry in sorted(os.scandir(args.root), key=lambda e: e.name):
+                counts_folder = os.path.join(entry.path, "BlockCounts")
+                if entry.is_dir() and os.path.isdir(counts_folder):
+                    print(f"✅ {entry.name}: {store.ingest_counts_folder(entry.name, counts_folder)} processors")
+            return
+
+        rows = store.query(args.block, args.shape, args.theme, args.processor_type)
+        if args.themes_only:
+            for theme_name in sorted({row[0] for row in rows}):
+                print(theme_name)
+        else:
+            for theme_name, _, column, processor_type, block, count in rows:
+                print(f"{theme_name}\t{processor_type}\t{column}\t{block}\t{count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from theme_pipeline import (
+    filter_blocks_to_ignore,
+    ignored_blocks,
+    read_block_counts,
+    read_block_weights,
+)
+from spot_gradient_preview import find_spot_gradient
+from theme_cli import base_folder
+
+# Class: AliasTable
+# Purpose: Walker/Vose alias table for O(1) weighted sampling of one input_state's output steps
+class AliasTable:
+    __slots__ = ("outcomes", "probability", "alias")
+
+    def __init__(self, weights):
+        """Builds the table once from a {outcome: weight} mapping (weights need not sum to 1)."""
+        self.outcomes = list(weights)
+        values = np.array([weights[outcome] for outcome in self.outcomes], dtype=np.float64)
+        if len(values) == 0 or values.sum() <= 0 or (values < 0).any():
+            raise ValueError("Alias tables need at least one positive weight and no negative weights")
+
+        count = len(values)
+        scaled = values * count / values.sum()
+        self.probability = np.ones(count, dtype=np.float64)
+        self.alias = np.arange(count, dtype=np.int64)
+
+        small = [i for i in range(count) if scaled[i] < 1.0]
+        large = [i for i in range(count) if scaled[i] >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1 up to floating point error
+        for i in small + large:
+            self.probability[i] = 1.0
+
+    def sample(self, size, rng):
+        """Draws `size` outcome indices in one batch."""
+        column = rng.integers(0, len(self.outcomes), size=size)
+        keep = rng.random(size) < self.probability[column]
+        return np.where(keep, column, self.alias[column])
+
+    def frequencies(self, size, rng):
+        """Empirical frequency of each outcome over `size` samples, in outcome order."""
+        return np.bincount(self.sample(size, rng), minlength=len(self.outcomes)) / size
+
+# Function: check_weights
+# Purpose: Samples generated weights and compares them with the block counts they came from
+# Input: {input_state: {block: count}}, {input_state: {block: weight}}, samples per column, tolerance and seed
+# Output: List of per-column result dictionaries; "drifted" is True past the tolerance
+def check_weights(theme_counts, theme_weights, samples=1_000_000, tolerance=0.01, seed=0):
+    """Checks that sampling the generated weights reproduces each column's original block mix.
+
+    Drift is the largest absolute difference between a block's sampled frequency and its share
+    of the original counts. Blocks present in only one side count with a share of 0 on the other.
+    """
+    rng = np.random.default_rng(seed)
+    results = []
+    for input_state, block_counts in theme_counts.items():
+        block_counts = filter_blocks_to_ignore(block_counts, ignored_blocks)
+        total = sum(block_counts.values())
+        block_weights = {block: weight for block, weight in theme_weights.get(input_state, {}).items() if weight > 0}
+        if total == 0:
+            continue
+        if not block_weights:
+            results.append({"input_state": input_state, "drift": 1.0, "rounding_drift": 1.0, "worst_block": None, "drifted": True})
+            continue
+
+        table = AliasTable(block_weights)
+        sampled = dict(zip(table.outcomes, table.frequencies(samples, rng).tolist()))
+        blocks = sorted(set(block_counts) | set(sampled))
+        expected = np.array([block_counts.get(block, 0) / total for block in blocks])
+        drift = np.abs(np.array([sampled.get(block, 0.0) for block in blocks]) - expected)
+        weight_total = sum(block_weights.values())
+        rounding_drift = np.abs(np.array([block_weights.get(block, 0.0) / weight_total for block in blocks]) - expected)
+
+        worst = int(np.argmax(drift))
+        results.append({
+            "input_state": input_state,
+            "drift": round(float(drift[worst]), 6),
+            "rounding_drift": round(float(rounding_drift.max()), 6),
+            "worst_block": blocks[worst],
+            "drifted": bool(drift[worst] > tolerance),
+        })
+    return results
+
+# Function: read_document_weights
+# Purpose: Reads the output_steps of a generated processors document as block weights
+# Input: Path to the processors JSON
+# Output: Dictionary of input_state -> {block: step_size}
+def read_document_weights(json_file_path):
+    with open(json_file_path, encoding="utf-8") as f:
+        spot_gradient = find_spot_gradient(json.load(f))
+    theme_weights = {}
+    for replacement in spot_gradient.get("replacements", []):
+        block_weights = theme_weights.setdefault(replacement["input_state"], {})
+        for step in replacement.get("output_steps", []):
+            block_weights[step["output_state"]] = block_weights.get(step["output_state"], 0.0) + step["step_size"]
+    return theme_weights
+
+def main():
+    parser = argparse.ArgumentParser(description="Check generated weights against the block counts they came from.")
+    parser.add_argument("theme", help="Theme folder name (or path) with BlockCounts and BlockWeights")
+    parser.add_argument("--document", help="Check the output_steps of this processors JSON instead of BlockWeights")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="Samples drawn per column")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Largest allowed frequency difference per block")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+
+    theme_folder = args.theme if os.path.isdir(args.theme) else os.path.join(base_folder, args.theme)
+    theme_counts = read_block_counts(os.path.join(theme_folder, "BlockCounts"))
+    if args.document:
+        theme_weights = read_document_weights(args.document)
+    else:
+        theme_weights = read_block_weights(os.path.join(theme_folder, "BlockWeights"))
+
+    results = check_weights(theme_counts, theme_weights, args.samples, args.tolerance, args.seed)
+    drifted = [result for result in results if result["drifted"]]
+
+    if args.json:
+        print(json.dumps({"columns": len(results), "drifted": len(drifted), "results": results}, indent=2))
+    else:
+        for result in drifted:
+            print(f"❌ {result['input_state']}: drift {result['drift']:.4f} on {result['worst_block']} "
+                  f"(rounding alone {result['rounding_drift']:.4f})")
+        print(f"{'✅' if not drifted else '⚠️'} {len(results) - len(drifted)}/{len(results)} columns within {args.tolerance}")
+
+    sys.exit(1 if drifted else 0)
+
+if __name__ == "__main__":
+    main()